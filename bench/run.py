@@ -0,0 +1,181 @@
+"""
+Бенчмарк режимов парсера на записанном снимке страниц.
+
+Запуск из корня репозитория:
+    python bench/run.py --repeat 5 --output bench_results.json
+    python bench/run.py --compare bench_results.json
+"""
+import argparse
+import io
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from contextlib import redirect_stderr
+from pathlib import Path
+
+import requests_mock
+
+from requests_cache import CachedSession
+
+BENCH_DIR = Path(__file__).resolve().parent
+SNAPSHOT_DIR = BENCH_DIR / "snapshot"
+SRC_DIR = BENCH_DIR.parent / "src"
+
+MODES = ("whats-new", "latest-versions", "download", "pep")
+
+
+def load_manifest():
+    with open(SNAPSHOT_DIR / "manifest.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_replay_session(manifest):
+    """Сессия, которая отдаёт страницы снимка вместо сети."""
+    adapter = requests_mock.Adapter()
+    for url, file_name in manifest.items():
+        content = (SNAPSHOT_DIR / file_name).read_bytes()
+        adapter.register_uri("GET", url, content=content)
+        adapter.register_uri(
+            "HEAD", url, headers={"Content-Length": str(len(content))}
+        )
+    session = CachedSession(backend="memory")
+    session.mount("https://", adapter)
+    session.mock_adapter = adapter
+    return session
+
+
+def run_mode(mode, manifest, download_dir):
+    """Выполняет режим на холодном кеше, возвращает время и число запросов."""
+    import main
+
+    session = get_replay_session(manifest)
+    main.BASE_DIR = download_dir
+    # Кеш разбора страниц сбрасывается, чтобы каждый прогон был холодным.
+    main.PARSED_PAGES_DB = download_dir / "parsed_pages.sqlite3"
+    main.PARSED_PAGES_DB.unlink(missing_ok=True)
+    started = time.perf_counter()
+    with redirect_stderr(io.StringIO()):
+        main.MODE_TO_FUNCTION[mode](session)
+    return time.perf_counter() - started, session.mock_adapter.call_count
+
+
+def measure_allocations(mode, manifest, download_dir):
+    tracemalloc.start()
+    run_mode(mode, manifest, download_dir)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def summarize(timings):
+    return {
+        "min_ms": round(min(timings) * 1000, 3),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "max_ms": round(max(timings) * 1000, 3),
+    }
+
+
+def bench_modes(modes, repeat, manifest):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        download_dir = Path(tmp)
+        for mode in modes:
+            timings = []
+            for _ in range(repeat):
+                elapsed, requests_count = run_mode(
+                    mode, manifest, download_dir
+                )
+                timings.append(elapsed)
+            results[mode] = {
+                "wall": summarize(timings),
+                "requests": requests_count,
+                "alloc_peak_kib": measure_allocations(
+                    mode, manifest, download_dir
+                ) // 1024,
+            }
+    return results
+
+
+def bench_parsing(repeat, manifest):
+    """Время построения дерева для каждой HTML-страницы снимка."""
+    import utils
+
+    results = {}
+    for file_name in sorted(set(manifest.values())):
+        if not file_name.endswith(".html"):
+            continue
+        html = (SNAPSHOT_DIR / file_name).read_text(encoding="utf-8")
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            utils.parse_html(html)
+            timings.append(time.perf_counter() - started)
+        results[file_name] = summarize(timings)
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=BENCH_DIR,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    print(f"{'mode':<20}{'baseline, ms':>15}{'current, ms':>15}{'delta':>10}")
+    for mode, stats in current["modes"].items():
+        if mode not in baseline["modes"]:
+            continue
+        old = baseline["modes"][mode]["wall"]["median_ms"]
+        new = stats["wall"]["median_ms"]
+        delta = (new - old) / old * 100 if old else 0
+        print(f"{mode:<20}{old:>15.1f}{new:>15.1f}{delta:>+9.1f}%")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк режимов парсера")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Файл для JSON-отчёта")
+    parser.add_argument(
+        "--compare", type=Path, help="JSON-отчёт предыдущего запуска"
+    )
+    return parser.parse_args()
+
+
+def run():
+    args = parse_args()
+    sys.path.append(str(SRC_DIR))
+    manifest = load_manifest()
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "modes": bench_modes(args.modes, args.repeat, manifest),
+        "parse": bench_parsing(args.repeat, manifest),
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    run()
@@ -2,35 +2,312 @@ import argparse
 import logging
 
 from logging.handlers import RotatingFileHandler
+from pathlib import Path
 
 from constants import (
+    ALL_VERSIONS,
+    API_SOURCE,
+    ARCHIVE_FORMATS,
+    BATCH_MODE,
     BACKUP_COUNT,
+    CACHE_ACTION_WITHOUT_CACHE_MODE,
+    CACHE_ACTIONS,
+    CACHE_BACKENDS,
+    CACHE_MODE,
+    CACHE_PATH,
+    CACHE_STATS,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_PROCESSES,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    DEFAULT_WORKERS,
     DT_FORMAT,
-    FILE_OUTPUT,
+    HOST_BURST,
+    HOST_RATE,
+    HTML_SOURCE,
     LOG_DIR,
     LOG_FILE,
     LOG_FORMAT,
     MAX_BYTES,
-    PRETTY_OUTPUT,
+    NOT_SERVED_MODES,
+    SQLITE_CACHE,
+    OUTPUT_CHOICES,
+    PDF_A4_FORMAT,
+    SERVE_HOST,
+    SERVE_MODE,
+    SERVE_PORT,
+    SERVED_MODES,
+    SOURCE_CHOICES,
+    UNKNOWN_MODES,
+    VERIFY_ALL,
+    VERIFY_CHOICES,
+    WATCH_INTERVAL,
+    WATCH_MODE,
 )
 
 
-def configure_argument_parser(available_modes):
-    parser = argparse.ArgumentParser(
+def positive_int(value):
+    """Преобразует аргумент командной строки в положительное целое число."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f"Ожидается положительное целое число: {value}"
+        )
+    return number
+
+
+def non_negative_int(value):
+    """Преобразует аргумент командной строки в неотрицательное целое число."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            f"Ожидается неотрицательное целое число: {value}"
+        )
+    return number
+
+
+def positive_float(value):
+    """Преобразует аргумент командной строки в положительное число."""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(
+            f"Ожидается положительное число: {value}"
+        )
+    return number
+
+
+def mode_list(batch_modes):
+    """Создаёт преобразователь списка режимов через запятую."""
+
+    def convert(value):
+        modes = [mode.strip() for mode in value.split(",") if mode.strip()]
+        unknown = [mode for mode in modes if mode not in batch_modes]
+        if unknown or not modes:
+            raise argparse.ArgumentTypeError(
+                UNKNOWN_MODES.format(", ".join(unknown) or value)
+            )
+        return modes
+
+    return convert
+
+
+class ParserArgumentParser(argparse.ArgumentParser):
+    """
+    Парсер аргументов командной строки.
+    Действие кеша можно указать только вместе с режимом cache, без него
+    режим cache выводит сводку. Режим serve принимает в --modes только
+    режимы, которые возвращают результаты.
+    """
+
+    def parse_known_args(self, args=None, namespace=None):
+        namespace, extras = super().parse_known_args(args, namespace)
+        if namespace.mode == SERVE_MODE and namespace.modes:
+            not_served = [
+                mode for mode in namespace.modes if mode not in SERVED_MODES
+            ]
+            if not_served:
+                self.error(
+                    NOT_SERVED_MODES.format(SERVE_MODE, ", ".join(not_served))
+                )
+        if namespace.cache_action is None:
+            namespace.cache_action = CACHE_STATS
+        elif namespace.mode != CACHE_MODE:
+            self.error(
+                CACHE_ACTION_WITHOUT_CACHE_MODE.format(
+                    namespace.cache_action, CACHE_MODE
+                )
+            )
+        return namespace, extras
+
+
+def configure_argument_parser(available_modes, batch_modes=()):
+    parser = ParserArgumentParser(
         description="Парсер документации Python и PEP"
     )
     parser.add_argument(
         "mode", choices=available_modes, help="Режимы работы парсера"
     )
+    parser.add_argument(
+        "--modes",
+        type=mode_list(batch_modes),
+        help=(
+            f"Режимы для запуска {BATCH_MODE} и {SERVE_MODE} через запятую, "
+            f"по умолчанию для {BATCH_MODE} — все режимы, для {SERVE_MODE} — "
+            f"{','.join(SERVED_MODES)}"
+        ),
+    )
     parser.add_argument(
         "-c", "--clear-cache", action="store_true", help="Очистка кеша"
     )
+    parser.add_argument(
+        "cache_action",
+        nargs="?",
+        choices=CACHE_ACTIONS,
+        help=f"Действие режима {CACHE_MODE}, по умолчанию {CACHE_STATS}",
+    )
+    parser.add_argument(
+        "--cache-backend",
+        choices=CACHE_BACKENDS,
+        default=SQLITE_CACHE,
+        help="Бэкенд HTTP-кеша",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=Path,
+        default=CACHE_PATH,
+        help="Путь к базе или директории HTTP-кеша",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=positive_int,
+        help=(
+            "Предельный размер кеша в мегабайтах, давно не использованные "
+            "ответы вытесняются"
+        ),
+    )
+    parser.add_argument(
+        "--cache-compress",
+        action="store_true",
+        help="Сжатие сохраняемых в кеш ответов",
+    )
+    parser.add_argument(
+        "-r",
+        "--revalidate",
+        action="store_true",
+        help="Перепроверка кеша условными запросами при каждом обращении",
+    )
     parser.add_argument(
         "-o",
         "--output",
-        choices=(PRETTY_OUTPUT, FILE_OUTPUT),
+        choices=OUTPUT_CHOICES,
         help="Дополнительные способы вывода данных",
     )
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="Загрузка только изменившихся PEP",
+    )
+    parser.add_argument(
+        "--verify",
+        choices=VERIFY_CHOICES,
+        default=VERIFY_ALL,
+        help=(
+            "Проверка статусов PEP по их страницам: none — только таблица, "
+            "sample — выборка страниц, all — все страницы"
+        ),
+    )
+    parser.add_argument(
+        "--source",
+        choices=SOURCE_CHOICES,
+        default=HTML_SOURCE,
+        help=(
+            f"Источник статусов PEP: {API_SOURCE} — JSON API peps.python.org "
+            f"с переходом на HTML, если API недоступно"
+        ),
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=positive_float,
+        default=DEFAULT_CONNECT_TIMEOUT,
+        help="Таймаут соединения с сервером, секунды",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=positive_float,
+        default=DEFAULT_READ_TIMEOUT,
+        help="Таймаут ожидания ответа сервера, секунды",
+    )
+    parser.add_argument(
+        "--retries",
+        type=non_negative_int,
+        default=DEFAULT_RETRIES,
+        help="Число повторов запроса при сбоях сети и ответах 429/5xx",
+    )
+    parser.add_argument(
+        "--rate",
+        type=positive_float,
+        default=HOST_RATE,
+        help="Предельная частота запросов к одному хосту, запросов в секунду",
+    )
+    parser.add_argument(
+        "--burst",
+        type=positive_int,
+        default=HOST_BURST,
+        help="Число запросов к хосту, которые можно отправить без ожидания",
+    )
+    snapshot_group = parser.add_mutually_exclusive_group()
+    snapshot_group.add_argument(
+        "--record",
+        type=Path,
+        metavar="DIR",
+        help="Сохранить все запросы и ответы в снимок в директории DIR",
+    )
+    snapshot_group.add_argument(
+        "--replay",
+        type=Path,
+        metavar="DIR",
+        help="Брать ответы из снимка в директории DIR без обращений к сети",
+    )
+    parser.add_argument(
+        "--interval",
+        type=positive_float,
+        default=WATCH_INTERVAL,
+        help=(
+            f"Период опроса страниц в режиме {WATCH_MODE} и обновления "
+            f"результатов в режиме {SERVE_MODE}, секунды"
+        ),
+    )
+    parser.add_argument(
+        "--host",
+        default=SERVE_HOST,
+        help=f"Адрес HTTP-сервера режима {SERVE_MODE}",
+    )
+    parser.add_argument(
+        "--port",
+        type=non_negative_int,
+        default=SERVE_PORT,
+        help=f"Порт HTTP-сервера режима {SERVE_MODE}",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=positive_int,
+        default=DEFAULT_WORKERS,
+        help="Количество потоков для загрузки страниц",
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=positive_int,
+        default=DEFAULT_PROCESSES,
+        help="Количество процессов для разбора статей",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=tuple(ARCHIVE_FORMATS),
+        default=[PDF_A4_FORMAT],
+        help="Форматы архивов документации для загрузки",
+    )
+    parser.add_argument(
+        "--versions",
+        nargs="+",
+        help=(
+            "Версии документации для загрузки, например 3.12 3.13, "
+            f"или {ALL_VERSIONS}"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Сводка времени по этапам работы парсера",
+    )
+    parser.add_argument(
+        "--profile-dump",
+        type=Path,
+        help="Файл для сохранения профиля cProfile",
+    )
     return parser
 
 
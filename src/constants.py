@@ -1,13 +1,50 @@
+import os
+
 from pathlib import Path
 
 # URL-адреса
 MAIN_DOC_URL = "https://docs.python.org/3/"
 PEP_URL = "https://peps.python.org/numerical/"
+PEP_API_URL = "https://peps.python.org/api/peps.json"
+
+# Сроки хранения страниц в кеше, секунды
+HOUR = 60 * 60
+DAY = 24 * HOUR
+CACHE_EXPIRE_AFTER = -1
+URLS_EXPIRE_AFTER = {
+    "peps.python.org/numerical": HOUR,
+    "peps.python.org/api": HOUR,
+    "peps.python.org/pep-*": DAY,
+    "docs.python.org": DAY,
+}
+
+# Бэкенды и обслуживание кеша
+SQLITE_CACHE = "sqlite"
+FILESYSTEM_CACHE = "filesystem"
+MEMORY_CACHE = "memory"
+CACHE_BACKENDS = (SQLITE_CACHE, FILESYSTEM_CACHE, MEMORY_CACHE)
+COMPRESSED_CACHE_EXTENSION = "zpkl"
+# Сколько обращений к кешу копится в памяти до записи в SQLite
+CACHE_ACCESS_FLUSH_SIZE = 100
+CACHE_MODE = "cache"
+BATCH_MODE = "all"
+WATCH_MODE = "watch"
+SERVE_MODE = "serve"
+CACHE_STATS = "stats"
+CACHE_VACUUM = "vacuum"
+CACHE_PRUNE = "prune"
+CACHE_ACTIONS = (CACHE_STATS, CACHE_VACUUM, CACHE_PRUNE)
+CACHE_STATS_HEADER = ("Параметр", "Значение")
 
 # Пути и директории
 BASE_DIR = Path(__file__).parent
 LOG_DIR = BASE_DIR / "logs"
 LOG_FILE = LOG_DIR / "parser.log"
+PEP_STATE_DB = BASE_DIR / "pep_state.sqlite3"
+CACHE_PATH = BASE_DIR / "http_cache"
+PARSED_PAGES_DB = BASE_DIR / "parsed_pages.sqlite3"
+RESULTS_DB_NAME = "results.sqlite3"
+RESULTS_DB = BASE_DIR / RESULTS_DB_NAME
 
 # Форматы даты и времени
 DATETIME_FORMAT = "%Y-%m-%d_%H-%M-%S"
@@ -21,9 +58,172 @@ BACKUP_COUNT = 5
 # Параметры вывода
 PRETTY_OUTPUT = "pretty"
 FILE_OUTPUT = "file"
+JSONL_OUTPUT = "jsonl"
+PARQUET_OUTPUT = "parquet"
+ARROW_OUTPUT = "arrow"
+SQLITE_OUTPUT = "sqlite"
+OUTPUT_CHOICES = (
+    PRETTY_OUTPUT,
+    FILE_OUTPUT,
+    JSONL_OUTPUT,
+    PARQUET_OUTPUT,
+    ARROW_OUTPUT,
+    SQLITE_OUTPUT,
+)
+
+# Итоговая строка сводки: выводится, но в SQLite не сохраняется,
+# чтобы GROUP BY и SUM по запуску не учитывали её как статус
+RESULT_TOTAL_ROW = "Total"
+# Таблицы результатов в SQLite: имя, столбцы с типами, ключ строки
+RESULT_TABLES = {
+    "whats-new": (
+        "whats_new",
+        (("url", "TEXT"), ("title", "TEXT"), ("editors", "TEXT")),
+        "url",
+    ),
+    "latest-versions": (
+        "latest_versions",
+        (("version", "TEXT"), ("status", "TEXT"), ("url", "TEXT")),
+        "version",
+    ),
+    "pep": (
+        "pep_statuses",
+        (("status", "TEXT"), ("count", "INTEGER")),
+        "status",
+    ),
+}
+# Таблицы подробных строк режимов, которые выводят сводку
+DETAIL_TABLES = {
+    "pep": (
+        "pep_records",
+        (
+            ("number", "INTEGER"),
+            ("table_status", "TEXT"),
+            ("page_status", "TEXT"),
+            ("url", "TEXT"),
+        ),
+        "number",
+    ),
+}
+
+# Параметры параллельной загрузки
+DEFAULT_WORKERS = 8
+# Статей несколько десятков, запуск большего числа процессов дороже
+# выигрыша от разбора
+DEFAULT_PROCESSES = min(4, os.cpu_count() or 1)
+MAX_HOST_CONNECTIONS = 8
+POOL_CONNECTIONS = 10
+
+# Частота запросов к одному хосту: запросов в секунду и размер всплеска.
+# Ответы THROTTLE_STATUSES снижают частоту в RATE_SLOWDOWN раз, каждый
+# успешный ответ возвращает RATE_RECOVERY от заданной частоты.
+HOST_RATE = 20
+HOST_BURST = 10
+MIN_HOST_RATE = 0.5
+RATE_SLOWDOWN = 0.5
+RATE_RECOVERY = 0.05
+THROTTLE_STATUSES = frozenset((429, 503))
+
+# Таймауты, повторы запросов и отключение недоступных хостов
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+RETRY_AFTER_MAX = 120
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30
+
+# Режим наблюдения за изменениями
+WATCH_INTERVAL = 300
+NEW_PEP_EVENT = "new_pep"
+PEP_STATUS_EVENT = "pep_status_changed"
+NEW_VERSION_EVENT = "new_python_version"
+VERSION_STATUS_EVENT = "python_version_status_changed"
+
+# HTTP API результатов
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8000
+# Режимы, которые возвращают результаты и могут обновляться сервером
+SERVED_MODES = ("whats-new", "latest-versions", "pep")
+
+# Запись и воспроизведение снимков запросов
+SNAPSHOT_MANIFEST = "manifest.json"
+SNAPSHOT_OBJECTS_DIR = "objects"
+SNAPSHOT_COMPRESSION_LEVEL = 6
+SNAPSHOT_SKIPPED_HEADERS = frozenset(
+    ("content-encoding", "content-length", "transfer-encoding")
+)
+# Заголовки запроса, от которых зависит ответ, кроме метода и URL
+SNAPSHOT_KEY_HEADERS = ("If-None-Match", "If-Modified-Since", "If-Range")
+SNAPSHOT_CHUNK_SIZE = 64 * 1024
+
+# Загрузка файлов
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+PARTIAL_DOWNLOAD_SUFFIX = ".part"
+# Валидатор сборки файла, с которой начата недокачанная часть
+PART_VALIDATOR_SUFFIX = ".validator"
+DOWNLOAD_ETAGS_FILE = ".etags.json"
+NO_STORE_HEADERS = {"Cache-Control": "no-store", "Accept-Encoding": "identity"}
+PDF_A4_FORMAT = "pdf-a4"
+ARCHIVE_FORMATS = {
+    PDF_A4_FORMAT: "pdf-a4.zip",
+    "pdf-letter": "pdf-letter.zip",
+    "html": "html.zip",
+    "text": "text.zip",
+    "epub": ".epub",
+}
+ALL_VERSIONS = "all"
+VERSION_PATTERN = r"\d\.\d+"
+
+# Версии функций извлечения полей из страниц. Версию нужно увеличить
+# при изменении функции, чтобы сохранённые результаты разбора устарели.
+PEP_STATUS_EXTRACTOR = "pep_status"
+WHATS_NEW_EXTRACTOR = "whats_new_article"
+EXTRACTOR_VERSIONS = {
+    PEP_STATUS_EXTRACTOR: 1,
+    WHATS_NEW_EXTRACTOR: 1,
+}
+
+# Проверка статусов PEP по их страницам
+VERIFY_NONE = "none"
+VERIFY_SAMPLE = "sample"
+VERIFY_ALL = "all"
+VERIFY_CHOICES = (VERIFY_NONE, VERIFY_SAMPLE, VERIFY_ALL)
+PEP_SAMPLE_SIZE = 50
+
+# Источники статусов PEP
+HTML_SOURCE = "html"
+API_SOURCE = "api"
+SOURCE_CHOICES = (HTML_SOURCE, API_SOURCE)
+
+# Метрики
+STAGE_NETWORK = "network"
+STAGE_PARSE = "parse"
+STAGE_SELECT = "select"
+STAGE_OUTPUT = "output"
+STAGE_RATE_LIMIT = "rate_limit_wait"
+CACHE_HIT_COUNTER = "cache_hits"
+CACHE_MISS_COUNTER = "cache_misses"
+RETRY_COUNTER = "retries"
+TIMEOUT_COUNTER = "timeouts"
+CIRCUIT_TRIP_COUNTER = "circuit_trips"
+CIRCUIT_OPEN_COUNTER = "circuit_rejections"
+THROTTLED_COUNTER = "throttled_responses"
+METRICS_HEADER = (
+    "Этап",
+    "Вызовы",
+    "Всего, мс",
+    "p50, мс",
+    "p95, мс",
+    "Макс, мс",
+)
 
 
 # Статусы PEP
+PEP_HEADER_START = '<dl class="rfc2822'
+PEP_HEADER_END = "</dl>"
 EXPECTED_STATUS = {
     "A": ("Active", "Accepted"),
     "D": ("Deferred",),
@@ -43,14 +243,47 @@ LOG_ARGS_CMD = "Аргументы командной строки: {}"
 LOG_ARCHIVE_SAVED = "Архив был загружен и сохранён: {}"
 LOG_STATUS_MISMATCH_HEADER = "Несовпадающие статусы:"
 LOG_STATUS_MISMATCH_ENTRY = (
-    "URL: {url}\nСтатус на странице:"
+    "PEP {number}: {title}\nURL: {url}\nСтатус на странице:"
     " {page_status}\nСтатус в таблице: {table_status}"
 )
 LOG_SKIPP_VERSION = "Пропущена версия: {}"
 LOG_SKIPP_PEP = "Пропуск PEP: {}"
+LOG_RETRY = "Повтор запроса {} через {:.1f} с: {}"
+CIRCUIT_OPEN = "Запросы к {} временно прекращены: хост недоступен"
+LOG_WATCH_POLL_FAILED = "Не удалось проверить {}: {}"
+LOG_SERVE_START = "Результаты доступны по адресу http://{}:{}/"
+LOG_SERVE_REFRESH_FAILED = "Не удалось обновить результаты режима {}: {}"
+SERVE_NOT_FOUND = "Нет результатов режима: {}"
+LOG_BATCH_MODE = "Запуск режима {}"
+BATCH_FAILED = "Режимы завершились с ошибкой: {}"
+CACHE_ACTION_WITHOUT_CACHE_MODE = "Действие {} доступно только в режиме {}"
+NOT_SERVED_MODES = "Режим {} не возвращает результатов: {}"
+UNKNOWN_MODES = "Неизвестные режимы: {}"
+SNAPSHOT_MISSING = "В снимке нет ответа на запрос: {}"
+LOG_CACHE_EVICTED = "Из кеша вытеснено давно не использованных ответов: {}"
+LOG_CACHE_PRUNED = "Из кеша удалены просроченные ответы"
+LOG_CACHE_VACUUMED = "База кеша сжата"
+LOG_PEP_API_UNAVAILABLE = "API PEP недоступно, статусы берутся из HTML: {}"
+LOG_PEP_SAMPLE_MISMATCH_RATE = (
+    "Расхождения в выборке PEP: {} из {} (оценка доли: {:.1%})"
+)
 LOG_DOWNLOAD_START = "Начата загрузка файла: {}"
 LOG_DOWNLOAD_ERROR = "Ошибка при загрузке {}: {}"
+LOG_DOWNLOAD_SKIPPED = "Файл не изменился, загрузка пропущена: {}"
+LOG_SKIPP_ARCHIVE = "Не найден архив {} на странице {}"
+LOG_DOWNLOAD_RESUME = "Докачивание файла {} с байта {}"
+LOG_DOWNLOAD_SIZE_MISMATCH = "Размер файла {}: {} байт вместо {}"
+LOG_DOWNLOAD_CHECKSUM = "SHA-256 файла {}: {}"
+DOWNLOAD_FAILED = "Не удалось загрузить архивы: {}"
 LOG_CRITICAL_ERROR_IN_MODE = "Критическая ошибка в режиме '{}': {}"
 LOG_PARSER_STOP_BY_USER = "Работа парсера прервана пользователем"
 LOG_UNEXPECTED_ERROR = "Непредвиденная ошибка: {}"
 LOG_FILE_SAVED = "Файл с результатами был сохранён: {}"
+LOG_RESULTS_DB_SAVED = "Результаты запуска {} сохранены в базу: {}"
+NO_RESULTS_TABLE = "Для режима {} нет таблицы результатов в SQLite"
+PYARROW_REQUIRED = (
+    "Для форматов parquet и arrow установите пакет pyarrow: "
+    "pip install pyarrow"
+)
+LOG_PROFILE_SAVED = "Профиль cProfile сохранён: {}"
+CACHE_HIT_RATIO = "Доля ответов из кеша: {:.1%}"
@@ -4,3 +4,19 @@ class ParserFindTagException(Exception):
 
 class ParserHTTPException(Exception):
     """Вызывается при ошибках HTTP-запросов."""
+
+
+class ParserCircuitOpenException(ParserHTTPException):
+    """Вызывается, когда запросы к недоступному хосту временно прекращены."""
+
+
+class ParserSnapshotException(ParserHTTPException):
+    """Вызывается, когда в снимке нет ответа на запрос."""
+
+
+class ParserBatchException(Exception):
+    """Вызывается, когда режимы пакетного запуска завершились с ошибкой."""
+
+
+class ParserOutputException(Exception):
+    """Вызывается при ошибках вывода результатов."""
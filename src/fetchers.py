@@ -0,0 +1,153 @@
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from urllib.parse import urlparse
+
+import metrics
+
+from constants import (
+    DEFAULT_WORKERS,
+    HOST_BURST,
+    HOST_RATE,
+    MAX_HOST_CONNECTIONS,
+    MIN_HOST_RATE,
+    POOL_CONNECTIONS,
+    RATE_RECOVERY,
+    RATE_SLOWDOWN,
+    STAGE_RATE_LIMIT,
+    THROTTLE_STATUSES,
+    THROTTLED_COUNTER,
+)
+
+
+class HostLimiter:
+    """Ограничивает число одновременных запросов к хосту."""
+
+    def __init__(self, max_connections=MAX_HOST_CONNECTIONS):
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    @contextmanager
+    def slot(self, url):
+        """Занимает слот хоста на время выполнения запроса."""
+        host = urlparse(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.setdefault(
+                host, threading.BoundedSemaphore(self.max_connections)
+            )
+        with semaphore:
+            yield
+
+
+class _Bucket:
+    __slots__ = ("rate", "tokens", "updated")
+
+    def __init__(self, rate, tokens):
+        self.rate = rate
+        self.tokens = tokens
+        self.updated = time.monotonic()
+
+
+class RateLimiter:
+    """
+    Планировщик запросов по алгоритму token bucket, отдельно для
+    каждого хоста. Ответы 429 и 503 снижают частоту запросов к хосту,
+    успешные ответы постепенно возвращают её к заданной.
+    """
+
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def _get_bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.rate, self.burst)
+        return bucket
+
+    def acquire(self, url):
+        """Ждёт, пока для хоста освободится токен, и забирает его."""
+        with self._lock:
+            bucket = self._get_bucket(urlparse(url).netloc)
+            now = time.monotonic()
+            bucket.tokens = min(
+                self.burst,
+                bucket.tokens + (now - bucket.updated) * bucket.rate,
+            )
+            bucket.updated = now
+            # Токен берётся в долг: следующие запросы ждут дольше.
+            bucket.tokens -= 1
+            delay = -bucket.tokens / bucket.rate
+        if delay > 0:
+            with metrics.stage(STAGE_RATE_LIMIT):
+                time.sleep(delay)
+
+    def observe(self, url, status_code):
+        """Подстраивает частоту запросов к хосту под его ответ."""
+        with self._lock:
+            bucket = self._get_bucket(urlparse(url).netloc)
+            if status_code in THROTTLE_STATUSES:
+                bucket.rate = max(MIN_HOST_RATE, bucket.rate * RATE_SLOWDOWN)
+                bucket.tokens = min(bucket.tokens, 0)
+                metrics.count(THROTTLED_COUNTER)
+            elif bucket.rate < self.rate:
+                bucket.rate = min(
+                    self.rate, bucket.rate + self.rate * RATE_RECOVERY
+                )
+
+
+def fetch_concurrently(
+    func, urls, workers=DEFAULT_WORKERS, limiter=None, executor=None
+):
+    """
+    Применяет func к каждому URL в пуле потоков.
+    Переданный executor используется вместо нового пула и не закрывается.
+    Результаты возвращаются в порядке исходных URL.
+    """
+    limiter = limiter or HostLimiter()
+
+    def task(url):
+        with limiter.slot(url):
+            return func(url)
+
+    if workers <= 1:
+        yield from map(task, urls)
+        return
+
+    if executor is not None:
+        yield from executor.map(task, urls)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        yield from executor.map(task, urls)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def get_pool_options(workers):
+    """Параметры пула keep-alive соединений адаптера по числу воркеров."""
+    return {
+        "pool_connections": POOL_CONNECTIONS,
+        "pool_maxsize": workers,
+        "pool_block": True,
+    }
+
+
+def fetch_pages(session, func, urls, workers=DEFAULT_WORKERS):
+    """
+    Применяет func(session, url) ко всем URL в пуле потоков.
+    Если у сессии есть общий пул потоков worker_pool, загрузка идёт в нём.
+    """
+    return fetch_concurrently(
+        partial(func, session),
+        urls,
+        workers,
+        executor=getattr(session, "worker_pool", None),
+    )
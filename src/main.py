@@ -1,135 +1,459 @@
+import hashlib
+import inspect
+import json
 import logging
+import random
 import re
+import threading
+import time
 
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from copy import copy
+from datetime import datetime
+from functools import partial
+from operator import attrgetter
 from pathlib import Path
+from sys import intern
 from urllib.parse import urljoin
 
-import requests_cache
-
-from requests import RequestException
-from tqdm import tqdm
+import metrics
 
 from configs import configure_argument_parser, configure_logging
 from constants import (
+    ALL_VERSIONS,
+    API_SOURCE,
+    ARCHIVE_FORMATS,
+    BATCH_FAILED,
+    BATCH_MODE,
+    CACHE_MODE,
+    CACHE_PRUNE,
+    CACHE_STATS,
+    CACHE_STATS_HEADER,
+    CACHE_VACUUM,
+    DEFAULT_PROCESSES,
+    DEFAULT_WORKERS,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_ETAGS_FILE,
+    DOWNLOAD_FAILED,
     EXPECTED_STATUS,
+    HTML_SOURCE,
     LOG_ARCHIVE_SAVED,
     LOG_ARGS_CMD,
+    LOG_BATCH_MODE,
+    LOG_CACHE_PRUNED,
+    LOG_CACHE_VACUUMED,
     LOG_CRITICAL_ERROR_IN_MODE,
+    LOG_DOWNLOAD_CHECKSUM,
     LOG_DOWNLOAD_ERROR,
+    LOG_DOWNLOAD_RESUME,
+    LOG_DOWNLOAD_SIZE_MISMATCH,
+    LOG_DOWNLOAD_SKIPPED,
     LOG_DOWNLOAD_START,
     LOG_PARSER_START,
     LOG_PARSER_STOP,
     LOG_PARSER_STOP_BY_USER,
+    LOG_PEP_API_UNAVAILABLE,
+    LOG_PEP_SAMPLE_MISMATCH_RATE,
+    LOG_PROFILE_SAVED,
+    LOG_SERVE_REFRESH_FAILED,
+    LOG_SERVE_START,
+    LOG_SKIPP_ARCHIVE,
     LOG_SKIPP_PEP,
     LOG_SKIPP_VERSION,
     LOG_STATUS_MISMATCH_ENTRY,
     LOG_STATUS_MISMATCH_HEADER,
     LOG_UNEXPECTED_ERROR,
+    LOG_WATCH_POLL_FAILED,
     MAIN_DOC_URL,
+    NEW_PEP_EVENT,
+    NEW_VERSION_EVENT,
+    NO_STORE_HEADERS,
+    PARSED_PAGES_DB,
+    PART_VALIDATOR_SUFFIX,
+    PARTIAL_DOWNLOAD_SUFFIX,
+    PDF_A4_FORMAT,
+    PEP_API_URL,
+    PEP_HEADER_END,
+    PEP_HEADER_START,
+    PEP_SAMPLE_SIZE,
+    PEP_STATE_DB,
+    PEP_STATUS_EVENT,
+    PEP_STATUS_EXTRACTOR,
     PEP_URL,
+    RESULT_TOTAL_ROW,
+    SERVED_MODES,
+    SERVE_MODE,
+    STAGE_OUTPUT,
+    STAGE_PARSE,
+    STAGE_SELECT,
+    VERIFY_ALL,
+    VERIFY_SAMPLE,
+    VERSION_PATTERN,
+    VERSION_STATUS_EVENT,
+    WATCH_INTERVAL,
+    WATCH_MODE,
+    WHATS_NEW_EXTRACTOR,
+)
+from exceptions import (
+    ParserBatchException,
+    ParserFindTagException,
+    ParserHTTPException,
+)
+from fetchers import fetch_pages
+from models import ModeResults, PepRecord
+from outputs import control_output, metrics_output
+from retries import get_request_policy
+from storage import ParsedPagesStore, PepStateStore
+from utils import (
+    fetch_and_parse,
+    find_tag,
+    get_content_hash,
+    get_response,
+    parse_html,
+    progress_bar,
 )
-from exceptions import ParserFindTagException, ParserHTTPException
-from outputs import control_output
-from utils import fetch_and_parse, find_tag
 
 BASE_DIR = Path(__file__).parent
 
 
-def whats_new(session):
-    """Парсит список нововведений в Python из официальной документации."""
+def whats_new(
+    session,
+    workers=DEFAULT_WORKERS,
+    processes=DEFAULT_PROCESSES,
+    stream=False,
+):
+    """
+    Парсит список нововведений в Python из официальной документации.
+    Статьи загружаются в пуле потоков и разбираются в пуле процессов.
+    При stream=True строки возвращаются генератором по мере готовности.
+    """
+    rows = _iter_whats_new(session, workers, processes)
+    return rows if stream else list(rows)
+
+
+def _iter_whats_new(session, workers, processes):
     errors = []
     whats_new_url = urljoin(MAIN_DOC_URL, "whatsnew/")
     soup = fetch_and_parse(session, whats_new_url)
-    results = [("Ссылка на статью", "Заголовок", "Редактор, автор")]
+    yield ("Ссылка на статью", "Заголовок", "Редактор, автор")
 
-    news_items = soup.select(
-        "#what-s-new-in-python div.toctree-wrapper li.toctree-l1"
-    )
+    with metrics.stage(STAGE_SELECT):
+        news_items = soup.select(
+            "#what-s-new-in-python div.toctree-wrapper li.toctree-l1"
+        )
 
-    for section in tqdm(news_items, desc="Обработка новостей"):
+    version_links = []
+    for section in news_items:
         try:
             version_a_tag = find_tag(section, "a")
-            href = version_a_tag["href"]
-            version_link = urljoin(whats_new_url, href)
-            article_soup = fetch_and_parse(session, version_link)
-            results.append(
-                (
-                    version_link,
-                    find_tag(article_soup, "h1").text,
-                    find_tag(article_soup, "dl").text.replace("\n", " "),
-                )
-            )
-
-        except (ParserFindTagException, ParserHTTPException) as e:
+            version_links.append(urljoin(whats_new_url, version_a_tag["href"]))
+        except ParserFindTagException as e:
             errors.append(str(e))
 
+    pages = fetch_pages(
+        session, _fetch_article_html, version_links, workers
+    )
+    with closing(ParsedPagesStore(PARSED_PAGES_DB)) as parsed_pages:
+        articles = _parse_articles(
+            zip(version_links, pages), processes, parsed_pages
+        )
+        for row, error in progress_bar(
+            articles, total=len(version_links), desc="Обработка новостей"
+        ):
+            if error:
+                errors.append(error)
+                continue
+            yield row
+
     for error in errors:
         logging.debug(error)
 
-    return results
 
+def _fetch_article_html(session, version_link):
+    """
+    Загружает текст статьи и хеш её содержимого,
+    возвращая ошибку вместо исключения.
+    """
+    try:
+        response = get_response(session, version_link)
+        return response.text, get_content_hash(response.content), None
+    except ParserHTTPException as e:
+        return None, None, str(e)
+
+
+def _parse_articles(pages, processes, parsed_pages):
+    """
+    Разбирает загруженные статьи по мере их поступления.
+    Результаты возвращаются в исходном порядке статей.
+    """
+    if processes <= 1:
+        for version_link, page in pages:
+            yield _parse_article(version_link, page, parsed_pages)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    with ProcessPoolExecutor(
+        max_workers=processes, mp_context=get_context("spawn")
+    ) as executor:
+        pending = deque()
+        for version_link, page in pages:
+            pending.append(
+                _parse_article(version_link, page, parsed_pages, executor)
+            )
+            while pending and _is_parsed(pending[0]):
+                yield _get_parsed(pending.popleft())
+        while pending:
+            yield _get_parsed(pending.popleft())
+
+
+def _parse_article(version_link, page, parsed_pages, executor=None):
+    """
+    Разбирает статью, если её содержимое не встречалось раньше.
+    Неизменившиеся статьи берутся из кеша разбора без построения дерева.
+    С executor разбор уходит в пул процессов и возвращается future.
+    """
+    html, content_hash, error = page
+    if error:
+        return None, error
+    row = parsed_pages.get(WHATS_NEW_EXTRACTOR, version_link, content_hash)
+    if row:
+        return tuple(row), None
+    remember = partial(
+        _remember_article, parsed_pages, version_link, content_hash
+    )
+    if executor is None:
+        return remember(parse_whats_new_article(version_link, html))
+    future = executor.submit(parse_whats_new_article, version_link, html)
+    future.add_done_callback(partial(_remember_parsed_article, remember))
+    return future
 
-def latest_versions(session):
-    """Парсит список всех версий Python."""
+
+def _remember_parsed_article(remember, future):
+    # Ошибку пула, например BrokenProcessPool, поднимет result()
+    # в основном потоке, поэтому в кеш попадают только успешные разборы.
+    if not future.cancelled() and future.exception() is None:
+        remember(future.result())
+
+
+def _remember_article(parsed_pages, version_link, content_hash, parsed):
+    row, error = parsed
+    if not error:
+        parsed_pages.put(WHATS_NEW_EXTRACTOR, version_link, content_hash, row)
+    return parsed
+
+
+def _is_parsed(item):
+    return isinstance(item, tuple) or item.done()
+
+
+def _get_parsed(item):
+    return item if isinstance(item, tuple) else item.result()
+
+
+def parse_whats_new_article(version_link, html):
+    """Извлекает из статьи о нововведениях строку результата."""
+    try:
+        article_soup = parse_html(html)
+        return (
+            (
+                version_link,
+                find_tag(article_soup, "h1").text,
+                find_tag(article_soup, "dl").text.replace("\n", " "),
+            ),
+            None,
+        )
+    except ParserFindTagException as e:
+        return None, str(e)
+
+
+def latest_versions(session, stream=False):
+    """
+    Парсит список всех версий Python.
+    При stream=True строки возвращаются генератором.
+    """
+    rows = _iter_latest_versions(session)
+    return rows if stream else list(rows)
+
+
+def _iter_latest_versions(session):
     errors = []
     soup = fetch_and_parse(session, MAIN_DOC_URL)
-    results = [("Ссылка на документацию", "Версия", "Статус")]
-    pattern = r"Python (?P<version>\d\.\d+) \((?P<status>.*)\)"
-
-    version_links = soup.select(
-        'div.sphinxsidebarwrapper ul:contains("All versions") a'
+    yield ("Ссылка на документацию", "Версия", "Статус")
+    version_links = _select_version_links(soup)
+    yield from _parse_version_links(
+        progress_bar(version_links, desc="Обработка версий"), errors
     )
 
-    for link in tqdm(version_links, desc="Обработка версий"):
+    for error in errors:
+        logging.debug(LOG_SKIPP_VERSION.format(error))
+
+
+def _select_version_links(soup):
+    with metrics.stage(STAGE_SELECT):
+        return soup.select(
+            'div.sphinxsidebarwrapper ul:contains("All versions") a'
+        )
+
+
+def _parse_version_links(version_links, errors):
+    """Извлекает из ссылок боковой панели версию, статус и адрес."""
+    pattern = r"Python (?P<version>\d\.\d+) \((?P<status>.*)\)"
+    for link in version_links:
         try:
             text_match = re.search(pattern, link.text)
             version, status = (
                 text_match.groups() if text_match else (link.text, "")
             )
-            results.append((version, status, link["href"]))
+            yield (version, status, link["href"])
         except (KeyError, AttributeError) as e:
             errors.append(f"Ссылка {link.get('href', '')}: {str(e)}")
 
-    for error in errors:
-        logging.debug(LOG_SKIPP_VERSION.format(error))
-
-    return results
-
 
-def download(session):
+def download(
+    session,
+    workers=DEFAULT_WORKERS,
+    formats=(PDF_A4_FORMAT,),
+    versions=None,
+):
     """
-    Скачивает архив с документацией Python в формате PDF
-    или создаёт пустой файл.
+    Скачивает архивы документации Python в выбранных форматах
+    для одной или нескольких версий.
+    Ошибка загрузки одного архива не прерывает остальные: ETag
+    скачанных архивов сохраняются, а ошибки поднимаются вместе в конце.
     """
 
     download_dir = BASE_DIR / "downloads"
     download_dir.mkdir(exist_ok=True)
-    soup = fetch_and_parse(session, urljoin(MAIN_DOC_URL, "download.html"))
+    archive_urls = [
+        archive_url
+        for docs_url in _get_docs_urls(session, versions)
+        for archive_url in _find_archive_urls(session, docs_url, formats)
+    ]
+    if not archive_urls:
+        raise ParserFindTagException("Не найдены ссылки на архивы")
 
-    pdf_a4_tag = (
-        soup.select_one('table.docutils a[href$="pdf-a4.zip"]')
+    etags = _load_etags(download_dir)
+    downloaded = fetch_pages(
+        session,
+        partial(_try_download_file, download_dir=download_dir, etags=etags),
+        archive_urls,
+        workers,
     )
-    if not pdf_a4_tag or "href" not in pdf_a4_tag.attrs:
-        raise ParserFindTagException("Не найдена ссылка на PDF архив")
-    archive_url = urljoin(MAIN_DOC_URL, pdf_a4_tag["href"])
-    _download_file(session, archive_url, download_dir)
+    new_etags = {}
+    errors = []
+    for archive_url, (etag, error) in zip(archive_urls, downloaded):
+        if error:
+            errors.append(error)
+        elif etag:
+            new_etags[archive_url.split("/")[-1]] = etag
+    _save_etags(download_dir, {**etags, **new_etags})
+    if errors:
+        raise ParserHTTPException(DOWNLOAD_FAILED.format("; ".join(errors)))
+
+
+def _get_docs_urls(session, versions):
+    """Возвращает адреса документации выбранных версий Python."""
+    if not versions:
+        return [MAIN_DOC_URL]
+    if ALL_VERSIONS in versions:
+        return [
+            docs_url
+            for version, _, docs_url in latest_versions(session)[1:]
+            if re.fullmatch(VERSION_PATTERN, version)
+        ]
+    return [urljoin(MAIN_DOC_URL, f"../{version}/") for version in versions]
+
+
+def _find_archive_urls(session, docs_url, formats):
+    """Находит на странице загрузок ссылки на архивы нужных форматов."""
+    soup = fetch_and_parse(session, urljoin(docs_url, "download.html"))
+    archive_urls = []
+    for archive_format in formats:
+        with metrics.stage(STAGE_SELECT):
+            archive_tag = soup.select_one(
+                "table.docutils "
+                f'a[href$="{ARCHIVE_FORMATS[archive_format]}"]'
+            )
+        if not archive_tag or "href" not in archive_tag.attrs:
+            logging.debug(LOG_SKIPP_ARCHIVE.format(archive_format, docs_url))
+            continue
+        archive_urls.append(urljoin(docs_url, archive_tag["href"]))
+    return archive_urls
+
+
+def _load_etags(download_dir):
+    """Загружает ETag ранее скачанных архивов."""
+    etags_path = download_dir / DOWNLOAD_ETAGS_FILE
+    if not etags_path.exists():
+        return {}
+    with open(etags_path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _save_etags(download_dir, etags):
+    with open(download_dir / DOWNLOAD_ETAGS_FILE, "w", encoding="utf-8") as f:
+        json.dump(etags, f, indent=2)
+
+
+def _is_unchanged(file_path, etag, size, known_etag):
+    """Проверяет, совпадает ли скачанный файл с файлом на сервере."""
+    if not file_path.exists() or size is None:
+        return False
+    if file_path.stat().st_size != int(size):
+        return False
+    return not etag or etag == known_etag
+
+
+def _try_download_file(session, url, download_dir, etags=None):
+    """Скачивает файл, возвращая ETag и ошибку вместо исключения."""
+    try:
+        return _download_file(session, url, download_dir, etags), None
+    except ParserHTTPException as e:
+        return None, str(e)
+
 
+def _download_file(session, url, download_dir, etags=None):
+    """
+    Скачивает файл потоково, кусками фиксированного размера.
+    Недокачанный файл дозагружается запросом с заголовком Range,
+    не изменившийся на сервере файл пропускается.
+    Возвращает ETag файла на сервере.
+    """
+    from requests import RequestException
 
-def _download_file(session, url, download_dir):
-    """Вспомогательная функция для загрузки файла."""
     filename = url.split("/")[-1]
     file_path = download_dir / filename
+    part_path = download_dir / f"{filename}{PARTIAL_DOWNLOAD_SUFFIX}"
+    validator_path = download_dir / f"{part_path.name}{PART_VALIDATOR_SUFFIX}"
 
     try:
-        logging.info(LOG_DOWNLOAD_START.format(filename))
-        response = session.get(url)
-        response.raise_for_status()
-
-        with open(file_path, "wb") as file:
-            file.write(response.content)
+        head = get_request_policy(session).request(
+            session, "HEAD", url, headers=NO_STORE_HEADERS
+        )
+        head.raise_for_status()
+        etag = head.headers.get("ETag")
+        if _is_unchanged(
+            file_path,
+            etag,
+            head.headers.get("Content-Length"),
+            (etags or {}).get(filename),
+        ):
+            logging.info(LOG_DOWNLOAD_SKIPPED.format(filename))
+            return etag
 
+        logging.info(LOG_DOWNLOAD_START.format(filename))
+        file_checksum = _stream_to_file(
+            session, url, part_path, validator_path
+        )
+        part_path.replace(file_path)
+        validator_path.unlink(missing_ok=True)
+        logging.info(LOG_DOWNLOAD_CHECKSUM.format(filename, file_checksum))
         logging.info(LOG_ARCHIVE_SAVED.format(file_path))
+        return etag
 
     except RequestException as e:
         error_msg = LOG_DOWNLOAD_ERROR.format(filename, str(e))
@@ -137,17 +461,274 @@ def _download_file(session, url, download_dir):
         raise ParserHTTPException(error_msg)
 
 
-def pep(session):
-    """Анализирует статусы PEP."""
+def _stream_to_file(session, url, part_path, validator_path):
+    """
+    Дописывает тело ответа в файл и возвращает его SHA-256.
+    Часть файла дозагружается с заголовком If-Range, поэтому после
+    пересборки файла на сервере загрузка начинается заново.
+    Большие файлы не сохраняются в кеш сессии.
+    """
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    part_validator = (
+        validator_path.read_text(encoding="utf-8")
+        if validator_path.exists()
+        else None
+    )
+    headers = dict(NO_STORE_HEADERS)
+    if offset and part_validator:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = part_validator
+        logging.info(LOG_DOWNLOAD_RESUME.format(part_path.name, offset))
+
+    with get_request_policy(session).request(
+        session, "GET", url, headers=headers, stream=True
+    ) as response:
+        if "Range" in headers and response.status_code == 416:
+            part_path.unlink()
+            validator_path.unlink(missing_ok=True)
+            return _stream_to_file(session, url, part_path, validator_path)
+        response.raise_for_status()
+        if response.status_code != 206:
+            offset = 0
+            _save_range_validator(validator_path, response.headers)
+        content_length = response.headers.get("Content-Length")
+        expected_size = (
+            offset + int(content_length) if content_length else None
+        )
+
+        checksum = hashlib.sha256()
+        if offset:
+            _update_checksum(checksum, part_path)
+        with open(part_path, "ab" if offset else "wb") as file, progress_bar(
+            total=expected_size,
+            initial=offset,
+            unit="B",
+            unit_scale=True,
+            desc=part_path.stem,
+            leave=False,
+        ) as progress:
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                file.write(chunk)
+                checksum.update(chunk)
+                progress.update(len(chunk))
+
+    size = part_path.stat().st_size
+    if expected_size is not None and size != expected_size:
+        raise ParserHTTPException(
+            LOG_DOWNLOAD_SIZE_MISMATCH.format(
+                part_path.name, size, expected_size
+            )
+        )
+    return checksum.hexdigest()
+
+
+def _save_range_validator(validator_path, headers):
+    """
+    Запоминает валидатор сборки файла для If-Range.
+    Слабый ETag в If-Range недопустим, вместо него берётся Last-Modified.
+    """
+    etag = headers.get("ETag")
+    validator = (
+        etag
+        if etag and not etag.startswith("W/")
+        else headers.get("Last-Modified")
+    )
+    if validator:
+        validator_path.write_text(validator, encoding="utf-8")
+    else:
+        validator_path.unlink(missing_ok=True)
+
+
+def _update_checksum(checksum, file_path):
+    """Добавляет в хеш содержимое уже загруженной части файла."""
+    with open(file_path, "rb") as file:
+        for chunk in iter(partial(file.read, DOWNLOAD_CHUNK_SIZE), b""):
+            checksum.update(chunk)
+
+
+def pep(
+    session,
+    workers=DEFAULT_WORKERS,
+    incremental=False,
+    verify=VERIFY_ALL,
+    source=HTML_SOURCE,
+):
+    """
+    Анализирует статусы PEP.
+    При verify=none статусы берутся только из таблицы PEP, при sample
+    по выборке страниц оценивается доля расхождений с таблицей.
+    При source=api статусы берутся из JSON API и сверяются с таблицей.
+    Вместе со сводкой возвращаются статусы каждого PEP для вывода sqlite.
+    """
     soup = fetch_and_parse(session, PEP_URL)
+    errors = []
+
+    with metrics.stage(STAGE_SELECT):
+        section = soup.select_one("section#numerical-index")
+        records = _parse_pep_rows(section.select("tbody tr"), errors)
+
+    api_statuses = (
+        _fetch_api_statuses(session) if source == API_SOURCE else None
+    )
+    if api_statuses is not None:
+        status_counter, status_mismatches, records = _compare_api_statuses(
+            records, api_statuses
+        )
+    elif verify == VERIFY_ALL:
+        status_counter, status_mismatches, records = _verify_pep_statuses(
+            session, records, errors, workers, incremental
+        )
+    else:
+        status_counter = _count_index_statuses(records)
+        status_mismatches = []
+    if api_statuses is None and verify == VERIFY_SAMPLE:
+        sample = _sample_pep_records(records)
+        _, status_mismatches, checked = _verify_pep_statuses(
+            session, sample, errors, workers, incremental
+        )
+        checked = {record.number: record for record in checked}
+        records = [checked.get(record.number, record) for record in records]
+        logging.info(
+            LOG_PEP_SAMPLE_MISMATCH_RATE.format(
+                len(status_mismatches),
+                len(sample),
+                len(status_mismatches) / len(sample) if sample else 0,
+            )
+        )
+
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        for url_or_row, error in errors:
+            logging.debug(LOG_SKIPP_PEP.format(f"{url_or_row}: {error}"))
+
+    return ModeResults(
+        prepare_pep_results(status_counter, status_mismatches),
+        [
+            (
+                record.number,
+                record.table_status,
+                record.page_status,
+                record.url,
+            )
+            for record in records
+        ],
+    )
+
+
+def _fetch_api_statuses(session):
+    """
+    Загружает статусы всех PEP из JSON API.
+    Возвращает None, если API недоступно или ответ не удалось разобрать.
+    """
+    from requests import RequestException
+
+    try:
+        response = get_response(session, PEP_API_URL)
+        response.raise_for_status()
+        with metrics.stage(STAGE_PARSE):
+            peps = response.json()
+        return {
+            int(number): intern(pep["status"])
+            for number, pep in peps.items()
+        }
+    except (
+        ParserHTTPException,
+        RequestException,
+        ValueError,
+        KeyError,
+        TypeError,
+        AttributeError,
+    ) as e:
+        logging.warning(LOG_PEP_API_UNAVAILABLE.format(e))
+        return None
+
+
+def _compare_api_statuses(records, api_statuses):
+    """
+    Считает статусы по данным API и сверяет их с таблицей PEP.
+    Возвращает счётчик статусов, список расхождений и записи PEP
+    со статусами из API.
+    """
     status_counter = defaultdict(int)
+    for status in api_statuses.values():
+        status_counter[status] += 1
     status_mismatches = []
-    errors = []
+    checked = []
+    for record in records:
+        record = record._replace(page_status=api_statuses.get(record.number))
+        compare_statuses(record, status_mismatches)
+        checked.append(record)
+    return status_counter, status_mismatches, checked
+
+
+def _verify_pep_statuses(
+    session, records, errors, workers, incremental=False
+):
+    """
+    Загружает страницы PEP и сверяет их статусы с таблицей.
+    Возвращает счётчик статусов со страниц, список расхождений и записи
+    PEP со статусами со страниц.
+    """
+    status_counter = defaultdict(int)
+    status_mismatches = []
+    checked = []
+    with closing(ParsedPagesStore(PARSED_PAGES_DB)) as parsed_pages:
+        if incremental:
+            page_statuses = _fetch_changed_pep_statuses(
+                session, records, workers
+            )
+        else:
+            page_statuses = fetch_pages(
+                session,
+                partial(_fetch_pep_status, parsed_pages=parsed_pages),
+                [record.url for record in records],
+                workers,
+            )
+
+        for record, (page_status, error) in progress_bar(
+            zip(records, page_statuses),
+            total=len(records),
+            desc="Обработка PEP",
+        ):
+            if error:
+                errors.append(error)
+                continue
+            if page_status:
+                record = record._replace(page_status=intern(page_status))
+                status_counter[record.page_status] += 1
+            compare_statuses(record, status_mismatches)
+            checked.append(record)
+    return status_counter, status_mismatches, checked
+
+
+def _count_index_statuses(records):
+    """Считает статусы PEP по таблице, не загружая страницы PEP."""
+    status_counter = defaultdict(int)
+    for record in records:
+        status = record.table_status.rsplit(", ", 1)[-1]
+        if status:
+            status_counter[status] += 1
+    return status_counter
+
+
+def _sample_pep_records(records, size=PEP_SAMPLE_SIZE, rng=random):
+    """
+    Выбирает PEP для проверки пропорционально долям статусов в таблице.
+    Каждый статус таблицы попадает в выборку хотя бы одним PEP.
+    """
+    strata = defaultdict(list)
+    for record in records:
+        strata[record.table_status].append(record)
+    sample = []
+    for group in strata.values():
+        share = max(1, round(size * len(group) / len(records)))
+        sample.extend(rng.sample(group, min(share, len(group))))
+    return sorted(sample, key=attrgetter("number"))
 
-    section = soup.select_one("section#numerical-index")
-    rows = section.select("tbody tr")
 
-    for row in tqdm(rows, desc="Обработка PEP"):
+def _parse_pep_rows(rows, errors):
+    """Превращает строки таблицы PEP в записи PepRecord."""
+    records = []
+    for row in rows:
         try:
             cols = row.find_all("td")
             if len(cols) < 5:
@@ -155,30 +736,171 @@ def pep(session):
 
             status_abbr = cols[0].select_one("abbr")
             table_status = status_abbr["title"] if status_abbr else ""
+            abbr_text = cols[0].get_text(strip=True)
 
             link_tag = cols[1].select_one("a")
-            pep_url = urljoin(PEP_URL, link_tag["href"])
+            records.append(
+                PepRecord(
+                    number=int(link_tag.get_text(strip=True)),
+                    type=intern(abbr_text[:1]),
+                    status_code=intern(abbr_text[1:]),
+                    table_status=intern(table_status),
+                    page_status=None,
+                    url=urljoin(PEP_URL, link_tag["href"]),
+                    title=cols[2].get_text(strip=True),
+                    row_hash=get_content_hash(str(row).encode()),
+                )
+            )
+        except (KeyError, AttributeError, ValueError) as e:
+            errors.append((row.get_text(" ", strip=True), e))
+    return records
+
+
+def _fetch_pep_status(session, pep_url, parsed_pages=None):
+    """Получает статус PEP, возвращая ошибку вместо исключения."""
+    try:
+        return get_pep_status(session, pep_url, parsed_pages), None
+    except (ParserFindTagException, KeyError, AttributeError) as e:
+        return None, (pep_url, e)
+
+
+def _fetch_changed_pep_statuses(session, records, workers):
+    """
+    Загружает страницы PEP и разбирает только изменившиеся.
+    Страницы PEP, строка которых в таблице не изменилась, перепроверяются
+    условным запросом по сохранённому ETag или Last-Modified. Ответ 304
+    или то же содержимое оставляют статус из хранилища состояния.
+    Страницы изменившихся и новых строк тоже перепроверяются на сервере,
+    а не берутся из кеша сессии.
+    """
+    with closing(PepStateStore(PEP_STATE_DB)) as store:
+        known = store.load()
+        known_pages = {state["url"]: state for state in known.values()}
+        unchanged_urls = {
+            record.url
+            for record in records
+            if record.number in known
+            and known[record.number]["row_hash"] == record.row_hash
+        }
+        fetched = fetch_pages(
+            session,
+            partial(
+                _fetch_pep_state,
+                known_pages=known_pages,
+                unchanged_urls=unchanged_urls,
+            ),
+            [record.url for record in records],
+            workers,
+        )
 
-            page_status = get_pep_status(session, pep_url)
-            compare_statuses(
-                page_status, table_status, pep_url, status_mismatches
+        page_statuses = []
+        states = []
+        for record, (state, error) in zip(records, fetched):
+            if error:
+                page_statuses.append((None, error))
+                continue
+            page_statuses.append((state["page_status"], None))
+            state.update(
+                number=record.number,
+                url=record.url,
+                table_status=record.table_status,
+                row_hash=record.row_hash,
             )
+            states.append(state)
+        store.save(states)
+    return page_statuses
 
-            if page_status:
-                status_counter[page_status] += 1
 
-        except (ParserFindTagException, KeyError, AttributeError) as e:
-            errors.append(f"{pep_url}: {str(e)}")
+def _fetch_pep_state(session, pep_url, known_pages, unchanged_urls):
+    """
+    Загружает страницу PEP и разбирает её, только если содержимое
+    изменилось с прошлого запуска.
+    """
+    from requests_cache import EXPIRE_IMMEDIATELY
+
+    known_page = known_pages.get(pep_url)
+    # Страница в кеше сессии может быть старше строки таблицы,
+    # поэтому каждая страница перепроверяется на сервере.
+    options = {"expire_after": EXPIRE_IMMEDIATELY}
+    conditional = known_page and pep_url in unchanged_urls
+    if conditional:
+        options["headers"] = _get_validator_headers(known_page["validator"])
+    try:
+        response = get_response(session, pep_url, **options)
+        if conditional and response.status_code == 304:
+            return {
+                **known_page,
+                "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            }, None
+        content_hash = get_content_hash(response.content)
+        if known_page and known_page["content_hash"] == content_hash:
+            page_status = known_page["page_status"]
+        else:
+            page_status = parse_pep_status(response.text)
+    except (ParserFindTagException, KeyError, AttributeError) as e:
+        return None, (pep_url, e)
+    return {
+        "page_status": page_status,
+        "content_hash": content_hash,
+        "validator": response.headers.get(
+            "ETag", response.headers.get("Last-Modified")
+        ),
+        "fetched_at": datetime.now().isoformat(timespec="seconds"),
+    }, None
+
+
+def _get_validator_headers(validator):
+    """Заголовки условного запроса по сохранённому ETag или Last-Modified."""
+    if not validator:
+        return {}
+    if validator.startswith(('"', 'W/"')):
+        return {"If-None-Match": validator}
+    return {"If-Modified-Since": validator}
+
+
+def get_pep_status(session, pep_url, parsed_pages=None):
+    """
+    Получает статус PEP со страницы.
+    Если передан кеш разбора, неизменившаяся страница не разбирается.
+    """
+    response = get_response(session, pep_url)
+    if parsed_pages is None:
+        return parse_pep_status(response.text)
+    content_hash = get_content_hash(response.content)
+    status = parsed_pages.get(PEP_STATUS_EXTRACTOR, pep_url, content_hash)
+    if status is None:
+        status = parse_pep_status(response.text)
+        if status is not None:
+            parsed_pages.put(
+                PEP_STATUS_EXTRACTOR, pep_url, content_hash, status
+            )
+    return status
+
+
+def parse_pep_status(html):
+    """
+    Извлекает статус PEP из текста страницы.
+    Сначала разбирается только блок заголовков PEP, при неудаче —
+    вся страница.
+    """
+    status = _parse_pep_header_status(html)
+    if status is None:
+        status = _find_pep_status(parse_html(html))
+    return status
 
-    for error in errors:
-        logging.debug(LOG_SKIPP_PEP.format(error))
 
-    return prepare_pep_results(status_counter, status_mismatches)
+def _parse_pep_header_status(html):
+    """Разбирает только блок заголовков PEP, не строя дерево страницы."""
+    start = html.find(PEP_HEADER_START)
+    end = html.find(PEP_HEADER_END, start)
+    if start == -1 or end == -1:
+        return None
+    header = html[start:end + len(PEP_HEADER_END)]
+    return _find_pep_status(parse_html(header, only="dl"))
 
 
-def get_pep_status(session, pep_url):
-    """Получает статус PEP со страницы."""
-    soup = fetch_and_parse(session, pep_url)
+def _find_pep_status(soup):
+    """Находит значение поля Status в разобранной странице PEP."""
     status_dt = next(
         (
             dt
@@ -193,20 +915,14 @@ def get_pep_status(session, pep_url):
     return status_dd.get_text(strip=True) if status_dd else None
 
 
-def compare_statuses(page_status, table_status, pep_url, mismatches):
+def compare_statuses(record, mismatches):
     """Сравнивает статусы и сохраняет расхождения."""
-    if not page_status or not table_status:
+    if not record.page_status or not record.table_status:
         return
 
-    expected = EXPECTED_STATUS.get(table_status[0], [])
-    if page_status not in expected:
-        mismatches.append(
-            {
-                "url": pep_url,
-                "page_status": page_status,
-                "table_status": table_status,
-            }
-        )
+    expected = EXPECTED_STATUS.get(record.status_code, ())
+    if record.page_status not in expected:
+        mismatches.append(record)
 
 
 def prepare_pep_results(counter, mismatches):
@@ -214,22 +930,295 @@ def prepare_pep_results(counter, mismatches):
     results = [("Статус", "Количество")]
     total = sum(counter.values())
     results.extend(sorted(counter.items()))
-    results.append(("Total", total))
+    results.append((RESULT_TOTAL_ROW, total))
 
     if mismatches:
         logging.info(LOG_STATUS_MISMATCH_HEADER)
-        for m in mismatches:
-            logging.info(LOG_STATUS_MISMATCH_ENTRY.format(**m))
+        for record in mismatches:
+            logging.info(LOG_STATUS_MISMATCH_ENTRY.format(**record._asdict()))
 
     return results
 
 
+def manage_cache(session, cache_action=CACHE_STATS):
+    """
+    Обслуживает HTTP-кеш: stats выводит сводку, vacuum сжимает базу
+    SQLite, prune удаляет просроченные и вытесняет лишние ответы.
+    """
+    from requests_cache import SQLiteCache
+
+    cache = session.cache
+    if cache_action == CACHE_PRUNE:
+        cache.delete(expired=True)
+        if hasattr(cache.responses, "evict"):
+            cache.responses.evict()
+        logging.info(LOG_CACHE_PRUNED)
+    elif cache_action == CACHE_VACUUM and isinstance(cache, SQLiteCache):
+        with cache.responses.connection() as con:
+            con.execute("VACUUM")
+        logging.info(LOG_CACHE_VACUUMED)
+    return _get_cache_stats(cache)
+
+
+def _get_cache_stats(cache):
+    """Сводка по кешу: бэкенд, путь, число ответов и размер."""
+    from requests_cache import SQLiteCache
+
+    total = len(cache.responses)
+    if isinstance(cache, SQLiteCache):
+        fresh = cache.count(expired=False)
+    else:
+        fresh = sum(1 for _ in cache.filter(expired=False))
+    size = (
+        cache.responses.size() if hasattr(cache.responses, "size") else "-"
+    )
+    return [
+        CACHE_STATS_HEADER,
+        ("Бэкенд", type(cache).__name__),
+        ("Путь", cache.cache_name),
+        ("Ответов", total),
+        ("Просрочено", total - fresh),
+        ("Размер, байт", size),
+    ]
+
+
+def watch(session, interval=WATCH_INTERVAL, polls=None):
+    """
+    Следит за индексом PEP и списком версий Python.
+    Каждые interval секунд страницы перепроверяются условными запросами,
+    заново разбираются только изменившиеся. События о новых PEP и версиях
+    и о смене их статуса выводятся в stdout строками JSON. Первый опрос
+    запоминает исходное состояние и событий не создаёт.
+    """
+    pages = {}
+    poll = 0
+    while polls is None or poll < polls:
+        if poll:
+            time.sleep(interval)
+        for url, source in WATCH_SOURCES.items():
+            for event in _poll_watch_source(session, url, source, pages):
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+        poll += 1
+
+
+def _poll_watch_source(session, url, source, pages):
+    """
+    Загружает страницу и возвращает события по сравнению с прошлым опросом.
+    pages хранит для каждой страницы хеш содержимого и её состояние.
+    """
+    from requests_cache import EXPIRE_IMMEDIATELY
+
+    get_state, new_event, status_event = source
+    try:
+        response = get_response(
+            session, url, expire_after=EXPIRE_IMMEDIATELY
+        )
+        content_hash = get_content_hash(response.content)
+        if url in pages and pages[url][0] == content_hash:
+            return []
+        state = get_state(parse_html(response.text))
+    except (ParserHTTPException, ParserFindTagException) as e:
+        logging.warning(LOG_WATCH_POLL_FAILED.format(url, e))
+        return []
+    previous = pages[url][1] if url in pages else None
+    pages[url] = content_hash, state
+    if previous is None:
+        return []
+    return _diff_watch_states(previous, state, new_event, status_event)
+
+
+def _diff_watch_states(previous, current, new_event, status_event):
+    now = datetime.now().isoformat(timespec="seconds")
+    events = []
+    for key, item in current.items():
+        old = previous.get(key)
+        if old is None:
+            events.append({"event": new_event, "time": now, **item})
+        elif old["status"] != item["status"]:
+            events.append(
+                {
+                    "event": status_event,
+                    "time": now,
+                    **item,
+                    "old_status": old["status"],
+                }
+            )
+    return events
+
+
+def _get_pep_watch_state(soup):
+    section = find_tag(soup, "section", {"id": "numerical-index"})
+    return {
+        record.number: {
+            "number": record.number,
+            "title": record.title,
+            "status": record.table_status.rsplit(", ", 1)[-1],
+            "url": record.url,
+        }
+        for record in _parse_pep_rows(section.select("tbody tr"), [])
+    }
+
+
+def _get_versions_watch_state(soup):
+    return {
+        version: {"version": version, "status": status, "url": url}
+        for version, status, url in _parse_version_links(
+            _select_version_links(soup), []
+        )
+    }
+
+
+WATCH_SOURCES = {
+    PEP_URL: (_get_pep_watch_state, NEW_PEP_EVENT, PEP_STATUS_EVENT),
+    MAIN_DOC_URL: (
+        _get_versions_watch_state,
+        NEW_VERSION_EVENT,
+        VERSION_STATUS_EVENT,
+    ),
+}
+
+
+def get_mode_kwargs(mode_function, args):
+    """
+    Отбирает аргументы командной строки, которые принимает режим.
+    Режимы, умеющие отдавать строки генератором, запускаются в этом виде.
+    """
+    parameters = inspect.signature(mode_function).parameters
+    options = {**vars(args), "stream": True}
+    return {
+        name: value
+        for name, value in options.items()
+        if name in parameters and name != "session"
+    }
+
+
+def run_parser(session, args):
+    """Запускает выбранный режим и выводит результаты."""
+    if args.mode in RUNNER_MODES:
+        RUNNER_MODES[args.mode](session, args)
+        return
+    mode_function = {**MODE_TO_FUNCTION, **SERVICE_MODES}[args.mode]
+    results = mode_function(session, **get_mode_kwargs(mode_function, args))
+    if results is not None:
+        with metrics.stage(STAGE_OUTPUT):
+            control_output(results, args)
+
+
+def run_batch(session, args):
+    """
+    Запускает несколько режимов в одном процессе.
+    Режимы делят сессию, пул потоков загрузки и разобранные за запуск
+    страницы, результаты каждого режима выводятся отдельно. Ошибка
+    режима не останавливает остальные.
+    """
+    failed = []
+    session.page_memo = {}
+    session.worker_pool = ThreadPoolExecutor(max_workers=args.workers)
+    try:
+        for mode in args.modes or MODE_TO_FUNCTION:
+            logging.info(LOG_BATCH_MODE.format(mode))
+            mode_args = copy(args)
+            mode_args.mode = mode
+            try:
+                run_parser(session, mode_args)
+            except Exception as e:
+                logging.critical(
+                    LOG_CRITICAL_ERROR_IN_MODE.format(mode, str(e)),
+                    exc_info=True,
+                )
+                failed.append(mode)
+    finally:
+        session.worker_pool.shutdown(cancel_futures=True)
+        del session.page_memo, session.worker_pool
+    if failed:
+        raise ParserBatchException(BATCH_FAILED.format(", ".join(failed)))
+
+
+def serve(session, args):
+    """
+    Отдаёт последние результаты режимов по HTTP в виде JSON.
+    Режимы перезапускаются в фоне каждые args.interval секунд, запросы
+    обслуживаются из памяти и поддерживают If-None-Match.
+    """
+    from server import ResultsCache, ResultsServer
+
+    results = ResultsCache()
+    server = ResultsServer((args.host, args.port), results)
+    stop = threading.Event()
+    threading.Thread(
+        target=_refresh_results_forever,
+        args=(session, args, results, stop),
+        daemon=True,
+    ).start()
+    logging.info(LOG_SERVE_START.format(*server.server_address[:2]))
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
+
+
+def _refresh_results_forever(session, args, results, stop):
+    while True:
+        refresh_results(session, args, results)
+        if stop.wait(args.interval):
+            return
+
+
+def refresh_results(session, args, results):
+    """
+    Перезапускает режимы и сохраняет их результаты в results.
+    Если режим завершился ошибкой, остаются его прежние результаты.
+    """
+    for mode in args.modes or SERVED_MODES:
+        mode_function = MODE_TO_FUNCTION[mode]
+        try:
+            rows = mode_function(
+                session, **get_mode_kwargs(mode_function, args)
+            )
+            if rows is not None:
+                results.update(mode, rows)
+        except Exception as e:
+            logging.error(
+                LOG_SERVE_REFRESH_FAILED.format(mode, str(e)), exc_info=True
+            )
+
+
+def run_profiled(session, args):
+    """Запускает режим, при необходимости собирая метрики и профиль."""
+    if args.profile:
+        metrics.enable()
+    try:
+        if not args.profile_dump:
+            run_parser(session, args)
+            return
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run_parser, session, args)
+        finally:
+            profiler.dump_stats(args.profile_dump)
+            logging.info(LOG_PROFILE_SAVED.format(args.profile_dump))
+    finally:
+        if args.profile:
+            metrics_output()
+
+
 MODE_TO_FUNCTION = {
     "whats-new": whats_new,
     "latest-versions": latest_versions,
     "download": download,
     "pep": pep,
 }
+RUNNER_MODES = {
+    BATCH_MODE: run_batch,
+    SERVE_MODE: serve,
+}
+SERVICE_MODES = {
+    CACHE_MODE: manage_cache,
+    WATCH_MODE: watch,
+}
 
 
 def main():
@@ -238,25 +1227,26 @@ def main():
         configure_logging()
         logging.info(LOG_PARSER_START)
 
-        arg_parser = configure_argument_parser(MODE_TO_FUNCTION.keys())
+        arg_parser = configure_argument_parser(
+            (*MODE_TO_FUNCTION, *RUNNER_MODES, *SERVICE_MODES),
+            batch_modes=tuple(MODE_TO_FUNCTION),
+        )
         args = arg_parser.parse_args()
         logging.info(LOG_ARGS_CMD.format(args))
 
-        session = requests_cache.CachedSession()
-        if args.clear_cache:
-            session.cache.clear()
+        from sessions import create_session
 
         parser_mode = args.mode
-        try:
-            results = MODE_TO_FUNCTION[parser_mode](session)
-            if results is not None:
-                control_output(results, args)
-        except Exception as e:
-            logging.critical(
-                LOG_CRITICAL_ERROR_IN_MODE.format(parser_mode, str(e)),
-                exc_info=True,
-            )
-            raise
+        # Закрытие сессии сохраняет индекс снимка при записи запросов.
+        with create_session(args) as session:
+            try:
+                run_profiled(session, args)
+            except Exception as e:
+                logging.critical(
+                    LOG_CRITICAL_ERROR_IN_MODE.format(parser_mode, str(e)),
+                    exc_info=True,
+                )
+                raise
 
         logging.info(LOG_PARSER_STOP)
 
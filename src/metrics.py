@@ -0,0 +1,105 @@
+import threading
+import time
+
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+from constants import (
+    CACHE_HIT_COUNTER,
+    CACHE_MISS_COUNTER,
+    METRICS_HEADER,
+)
+
+_enabled = False
+_lock = threading.Lock()
+_timings = defaultdict(list)
+_counters = defaultdict(int)
+_disabled_stage = nullcontext()
+
+
+def enable():
+    """Включает сбор метрик."""
+    global _enabled
+    _enabled = True
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Сбрасывает накопленные замеры и счётчики."""
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+
+
+def stage(name):
+    """Замеряет время выполнения этапа, если сбор метрик включён."""
+    if not _enabled:
+        return _disabled_stage
+    return _timed_stage(name)
+
+
+@contextmanager
+def _timed_stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _lock:
+            _timings[name].append(elapsed)
+
+
+def count(name, value=1):
+    """Увеличивает счётчик события, если сбор метрик включён."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += value
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def get_summary():
+    """
+    Возвращает сводку по этапам: число вызовов, суммарное время,
+    p50, p95 и максимум в миллисекундах.
+    """
+    rows = [METRICS_HEADER]
+    with _lock:
+        timings = {name: sorted(values) for name, values in _timings.items()}
+    for name, values in sorted(timings.items()):
+        rows.append(
+            (
+                name,
+                len(values),
+                *(
+                    round(value * 1000, 2)
+                    for value in (
+                        sum(values),
+                        _percentile(values, 0.5),
+                        _percentile(values, 0.95),
+                        values[-1],
+                    )
+                ),
+            )
+        )
+    return rows
+
+
+def get_counters():
+    with _lock:
+        return dict(_counters)
+
+
+def get_cache_hit_ratio():
+    """Доля ответов, полученных из кеша."""
+    counters = get_counters()
+    hits = counters.get(CACHE_HIT_COUNTER, 0)
+    total = hits + counters.get(CACHE_MISS_COUNTER, 0)
+    return hits / total if total else 0.0
@@ -0,0 +1,26 @@
+from typing import NamedTuple, Optional
+
+
+class ModeResults(list):
+    """
+    Строки результатов режима.
+    В details лежат подробные строки для хранилища результатов,
+    например статусы отдельных PEP за сводной таблицей.
+    """
+
+    def __init__(self, rows, details=()):
+        super().__init__(rows)
+        self.details = details
+
+
+class PepRecord(NamedTuple):
+    """Строка таблицы PEP вместе со статусом со страницы PEP."""
+
+    number: int
+    type: str
+    status_code: str
+    table_status: str
+    page_status: Optional[str]
+    url: str
+    title: str
+    row_hash: str = ""
@@ -1,51 +1,165 @@
 import csv
 import datetime as dt
+import json
 import logging
 
-from prettytable import PrettyTable
+from contextlib import closing
+
+import metrics
 
 from constants import (
+    ARROW_OUTPUT,
     BASE_DIR,
+    CACHE_HIT_RATIO,
     DATETIME_FORMAT,
     FILE_OUTPUT,
+    JSONL_OUTPUT,
     LOG_FILE_SAVED,
+    LOG_RESULTS_DB_SAVED,
+    NO_RESULTS_TABLE,
+    PARQUET_OUTPUT,
     PRETTY_OUTPUT,
+    PYARROW_REQUIRED,
+    RESULT_TABLES,
+    RESULTS_DB_NAME,
+    SQLITE_OUTPUT,
 )
+from exceptions import ParserOutputException
+from storage import ResultsStore
+
+OUTPUT_WRITERS = {}
+
+
+def register_output(name):
+    """Регистрирует функцию вывода для значения аргумента -o."""
+
+    def decorator(writer):
+        OUTPUT_WRITERS[name] = writer
+        return writer
+
+    return decorator
 
 
 def control_output(results, cli_args):
-    output = cli_args.output
-    if output == PRETTY_OUTPUT:
-        pretty_output(results)
-    elif output == FILE_OUTPUT:
-        file_output(results, cli_args)
-    else:
-        default_output(results)
+    writer = OUTPUT_WRITERS.get(cli_args.output, default_output)
+    writer(results, cli_args)
 
 
-def default_output(results):
+def default_output(results, cli_args=None):
     for row in results:
-        print(*row)
+        print(*row, flush=True)
 
 
-def pretty_output(results):
+@register_output(PRETTY_OUTPUT)
+def pretty_output(results, cli_args=None):
+    from prettytable import PrettyTable
+
+    rows = iter(results)
     table = PrettyTable()
-    table.field_names = results[0]
+    table.field_names = next(rows)
     table.align = "l"
-    table.add_rows(results[1:])
+    table.add_rows(list(rows))
     print(table)
 
 
-def file_output(results, cli_args):
+def get_results_path(cli_args, extension):
+    """Возвращает путь к файлу результатов в директории results."""
     results_dir = BASE_DIR / "results"
     results_dir.mkdir(exist_ok=True)
-    parser_mode = cli_args.mode
-    now = dt.datetime.now()
-    now_formatted = now.strftime(DATETIME_FORMAT)
-    file_name = f"{parser_mode}_{now_formatted}.csv"
-    file_path = results_dir / file_name
+    now_formatted = dt.datetime.now().strftime(DATETIME_FORMAT)
+    return results_dir / f"{cli_args.mode}_{now_formatted}.{extension}"
+
+
+@register_output(FILE_OUTPUT)
+def file_output(results, cli_args):
+    file_path = get_results_path(cli_args, "csv")
 
     with open(file_path, "w", encoding="utf-8-sig") as f:
         writer = csv.writer(f, dialect="unix")
-        writer.writerows(results)
+        for row in results:
+            writer.writerow(row)
+            f.flush()
+    logging.info(LOG_FILE_SAVED.format(file_path))
+
+
+@register_output(JSONL_OUTPUT)
+def jsonl_output(results, cli_args):
+    """Записывает строки результатов как JSON-объекты по одному в строке."""
+    rows = iter(results)
+    header = next(rows)
+    file_path = get_results_path(cli_args, "jsonl")
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(header, row)), ensure_ascii=False))
+            f.write("\n")
+            f.flush()
     logging.info(LOG_FILE_SAVED.format(file_path))
+
+
+def _get_arrow_table(results):
+    """
+    Собирает результаты в таблицу Arrow.
+    Столбцы из целых чисел получают тип int64, остальные — string.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ParserOutputException(PYARROW_REQUIRED)
+
+    rows = iter(results)
+    header = next(rows)
+    columns = list(zip(*rows)) or [()] * len(header)
+    arrays = []
+    for values in columns:
+        if values and all(isinstance(value, int) for value in values):
+            arrays.append(pa.array(values, type=pa.int64()))
+        else:
+            arrays.append(
+                pa.array([str(value) for value in values], type=pa.string())
+            )
+    return pa.table(arrays, names=list(header))
+
+
+@register_output(PARQUET_OUTPUT)
+def parquet_output(results, cli_args):
+    table = _get_arrow_table(results)
+    import pyarrow.parquet as pq
+
+    file_path = get_results_path(cli_args, "parquet")
+    pq.write_table(table, file_path, compression="zstd")
+    logging.info(LOG_FILE_SAVED.format(file_path))
+
+
+@register_output(ARROW_OUTPUT)
+def arrow_output(results, cli_args):
+    table = _get_arrow_table(results)
+    import pyarrow as pa
+
+    file_path = get_results_path(cli_args, "arrow")
+    with pa.ipc.new_file(file_path, table.schema) as writer:
+        writer.write_table(table)
+    logging.info(LOG_FILE_SAVED.format(file_path))
+
+
+@register_output(SQLITE_OUTPUT)
+def sqlite_output(results, cli_args):
+    """Добавляет результаты запуска в базу SQLite рядом с results."""
+    if cli_args.mode not in RESULT_TABLES:
+        raise ParserOutputException(NO_RESULTS_TABLE.format(cli_args.mode))
+    rows = iter(results)
+    next(rows)
+    db_path = BASE_DIR / RESULTS_DB_NAME
+    with closing(ResultsStore(db_path)) as store:
+        run_id = store.save(
+            cli_args.mode, rows, getattr(results, "details", ())
+        )
+    logging.info(LOG_RESULTS_DB_SAVED.format(run_id, db_path))
+
+
+def metrics_output():
+    """Выводит сводку метрик по этапам работы парсера."""
+    pretty_output(metrics.get_summary())
+    print(CACHE_HIT_RATIO.format(metrics.get_cache_hit_ratio()))
+    for name, value in sorted(metrics.get_counters().items()):
+        print(name, value)
@@ -0,0 +1,183 @@
+import logging
+import random
+import threading
+import time
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import metrics
+
+from constants import (
+    BACKOFF_BASE,
+    BACKOFF_MAX,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_TIMEOUT,
+    CIRCUIT_OPEN,
+    CIRCUIT_OPEN_COUNTER,
+    CIRCUIT_TRIP_COUNTER,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    LOG_RETRY,
+    RETRY_AFTER_MAX,
+    RETRY_COUNTER,
+    RETRY_STATUSES,
+    TIMEOUT_COUNTER,
+)
+from exceptions import ParserCircuitOpenException
+
+
+def _get_origin(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class CircuitBreaker:
+    """
+    Прекращает запросы к хосту после серии неудач подряд.
+    Через reset_timeout к хосту пропускается пробный запрос: успех
+    возвращает хост в работу, неудача снова отключает его.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=BREAKER_RESET_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened_until = {}
+
+    def check(self, url):
+        """Вызывает исключение, если запросы к хосту прекращены."""
+        host = _get_origin(url)
+        with self._lock:
+            opened_until = self._opened_until.get(host)
+            if opened_until is None:
+                return
+            now = time.monotonic()
+            if now < opened_until:
+                metrics.count(CIRCUIT_OPEN_COUNTER)
+                raise ParserCircuitOpenException(CIRCUIT_OPEN.format(host))
+            # Пробный запрос: остальные ждут его результата ещё один период.
+            self._opened_until[host] = now + self.reset_timeout
+
+    def record_success(self, url):
+        host = _get_origin(url)
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_until.pop(host, None)
+
+    def record_failure(self, url):
+        host = _get_origin(url)
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold:
+                self._opened_until[host] = (
+                    time.monotonic() + self.reset_timeout
+                )
+                metrics.count(CIRCUIT_TRIP_COUNTER)
+
+
+class RequestPolicy:
+    """
+    Выполняет запросы с таймаутами и повторами.
+    Задержка между повторами растёт экспоненциально со случайным
+    разбросом, заголовок Retry-After её увеличивает.
+    """
+
+    def __init__(
+        self,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        backoff_base=BACKOFF_BASE,
+        backoff_max=BACKOFF_MAX,
+        breaker=None,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+    def request(self, session, method, url, **kwargs):
+        """
+        Выполняет запрос через сессию.
+        После исчерпания повторов возвращает последний ответ или
+        вызывает последнее исключение requests.
+        """
+        from requests.exceptions import (
+            ChunkedEncodingError,
+            ConnectionError,
+            Timeout,
+        )
+
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            self.breaker.check(url)
+            try:
+                response = session.request(method, url, **kwargs)
+            except (ConnectionError, Timeout, ChunkedEncodingError) as e:
+                if isinstance(e, Timeout):
+                    metrics.count(TIMEOUT_COUNTER)
+                self.breaker.record_failure(url)
+                if attempt == self.retries:
+                    raise
+                reason, delay = e, self._backoff(attempt)
+            else:
+                if response.status_code >= 500:
+                    self.breaker.record_failure(url)
+                else:
+                    self.breaker.record_success(url)
+                if (
+                    response.status_code not in RETRY_STATUSES
+                    or attempt == self.retries
+                ):
+                    return response
+                reason = response.status_code
+                delay = max(self._backoff(attempt), _retry_after(response))
+                response.close()
+            metrics.count(RETRY_COUNTER)
+            logging.info(LOG_RETRY.format(url, delay, reason))
+            time.sleep(delay)
+
+    def _backoff(self, attempt):
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2**attempt)
+        )
+
+
+def _retry_after(response):
+    """Задержка из заголовка Retry-After в секундах, 0 — если его нет."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return 0
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    return min(max(delay, 0), RETRY_AFTER_MAX)
+
+
+def get_request_policy(session):
+    """
+    Политика запросов сессии.
+    Сессии без политики получают политику по умолчанию при первом запросе,
+    поэтому состояние отключённых хостов не делится между сессиями.
+    """
+    policy = getattr(session, "request_policy", None)
+    if policy is None:
+        policy = session.request_policy = RequestPolicy()
+    return policy
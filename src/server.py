@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import threading
+
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+from constants import SERVE_NOT_FOUND
+
+
+class ResultsEntry(NamedTuple):
+    """Готовый к отправке ответ: тело JSON, его ETag и время обновления."""
+
+    body: bytes
+    etag: str
+    updated_at: str
+
+
+def _make_entry(data):
+    body = json.dumps(data, ensure_ascii=False).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    updated_at = datetime.now().isoformat(timespec="seconds")
+    return ResultsEntry(body, etag, updated_at)
+
+
+class ResultsCache:
+    """
+    Последние результаты режимов в памяти.
+    Тело ответа и ETag вычисляются при обновлении, поэтому запрос
+    обслуживается одним поиском в словаре.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._index = _make_entry({})
+
+    def update(self, mode, results):
+        """Сохраняет строки результатов режима, первая строка — заголовок."""
+        rows = iter(results)
+        header = next(rows)
+        entry = _make_entry([dict(zip(header, row)) for row in rows])
+        with self._lock:
+            entries = {**self._entries, mode: entry}
+            self._entries = entries
+            self._index = _make_entry(
+                {
+                    name: {"updated_at": item.updated_at, "etag": item.etag}
+                    for name, item in entries.items()
+                }
+            )
+
+    def get(self, mode):
+        """Ответ для режима; пустое имя режима — список режимов."""
+        if not mode:
+            return self._index
+        return self._entries.get(mode)
+
+
+class ResultsRequestHandler(BaseHTTPRequestHandler):
+    """Отдаёт результаты режимов по адресам вида /pep."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        mode = urlsplit(self.path).path.strip("/")
+        entry = self.server.results.get(mode)
+        if entry is None:
+            self._send(
+                HTTPStatus.NOT_FOUND,
+                json.dumps(
+                    {"error": SERVE_NOT_FOUND.format(mode)},
+                    ensure_ascii=False,
+                ).encode(),
+            )
+            return
+        if self._is_not_modified(entry.etag):
+            self._send(HTTPStatus.NOT_MODIFIED, etag=entry.etag)
+            return
+        self._send(HTTPStatus.OK, entry.body, entry.etag)
+
+    def _is_not_modified(self, etag):
+        if_none_match = self.headers.get("If-None-Match")
+        if not if_none_match:
+            return False
+        tags = {
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        }
+        return "*" in tags or etag in tags
+
+    def _send(self, status, body=b"", etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(format, *args)
+
+
+class ResultsServer(ThreadingHTTPServer):
+    """HTTP-сервер, отдающий результаты из ResultsCache."""
+
+    daemon_threads = True
+
+    def __init__(self, address, results):
+        super().__init__(address, ResultsRequestHandler)
+        self.results = results
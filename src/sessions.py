@@ -0,0 +1,259 @@
+import logging
+import sqlite3
+import time
+import zlib
+
+import requests_cache
+
+from requests.adapters import HTTPAdapter
+from requests_cache.backends.sqlite import SQLiteDict
+from requests_cache.serializers import (
+    SerializerPipeline,
+    Stage,
+    pickle_serializer,
+)
+
+from constants import (
+    CACHE_ACCESS_FLUSH_SIZE,
+    CACHE_EXPIRE_AFTER,
+    COMPRESSED_CACHE_EXTENSION,
+    FILESYSTEM_CACHE,
+    LOG_CACHE_EVICTED,
+    MEMORY_CACHE,
+    URLS_EXPIRE_AFTER,
+)
+from fetchers import RateLimiter, get_pool_options
+from retries import RequestPolicy
+from snapshots import RecordingAdapter, ReplayAdapter
+
+
+compressed_serializer = SerializerPipeline(
+    [
+        *pickle_serializer.stages,
+        Stage(zlib, dumps="compress", loads="decompress"),
+    ],
+    name="pickle-zlib",
+    is_binary=True,
+)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Транспорт, пропускающий запросы через RateLimiter.
+    Ответы из кеша requests_cache до транспорта не доходят и
+    не ограничиваются.
+    """
+
+    def __init__(self, limiter=None, **kwargs):
+        self.limiter = limiter or RateLimiter()
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire(request.url)
+        response = super().send(request, **kwargs)
+        self.limiter.observe(request.url, response.status_code)
+        return response
+
+
+class LRUSQLiteDict(SQLiteDict):
+    """
+    Таблица ответов SQLite с ограничением размера.
+    Для каждого ответа хранится время последнего обращения, при
+    переполнении удаляются давно не использованные ответы.
+    Времена обращений копятся в памяти и записываются пачкой, поэтому
+    чтение из кеша не открывает транзакцию записи.
+    """
+
+    def __init__(self, *args, max_cache_bytes, **kwargs):
+        # init_db родителя закрывает соединение, а close записывает
+        # накопленные обращения.
+        self._accessed = {}
+        super().__init__(*args, **kwargs)
+        self.max_cache_bytes = max_cache_bytes
+        self._size = self.total_size()
+
+    def init_db(self):
+        super().init_db()
+        with self.connection(commit=True) as con:
+            try:
+                con.execute(
+                    f"ALTER TABLE {self.table_name} ADD COLUMN accessed REAL"
+                )
+            except sqlite3.OperationalError:
+                pass
+            con.execute(
+                f"CREATE INDEX IF NOT EXISTS accessed_idx "
+                f"ON {self.table_name}(accessed)"
+            )
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        with self._lock:
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= CACHE_ACCESS_FLUSH_SIZE:
+                self.flush_accessed()
+        return value
+
+    def _write(self, key, value):
+        expires = getattr(value, "expires_unix", None)
+        value = self.serialize(value)
+        with self._lock:
+            self._accessed.pop(key, None)
+        with self.connection(commit=True) as con:
+            con.execute(
+                f"INSERT OR REPLACE INTO {self.table_name} "
+                f"(key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, expires, time.time()),
+            )
+        with self._lock:
+            # Оценка сверху: перезапись ответа учитывается как новый ответ,
+            # точный размер пересчитывается при вытеснении.
+            self._size += len(value)
+            if self._size > self.max_cache_bytes:
+                self.evict()
+
+    def flush_accessed(self):
+        """Записывает накопленные времена обращений одной транзакцией."""
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+            if not accessed:
+                return
+            with self.connection(commit=True) as con:
+                con.executemany(
+                    f"UPDATE {self.table_name} SET accessed = ? "
+                    f"WHERE key = ?",
+                    ((when, key) for key, when in accessed.items()),
+                )
+
+    def close(self):
+        self.flush_accessed()
+        super().close()
+
+    def total_size(self):
+        """Суммарный размер сохранённых ответов в байтах."""
+        with self.connection() as con:
+            return con.execute(
+                f"SELECT COALESCE(SUM(LENGTH(value)), 0) "
+                f"FROM {self.table_name}"
+            ).fetchone()[0]
+
+    def evict(self):
+        """Удаляет давно не использованные ответы сверх лимита размера."""
+        with self._lock:
+            self.flush_accessed()
+            excess = self.total_size() - self.max_cache_bytes
+            keys = []
+            if excess > 0:
+                with self.connection() as con:
+                    keys = [
+                        key
+                        for key, in con.execute(
+                            f"""
+                            WITH ordered AS (
+                                SELECT key, LENGTH(value) AS size,
+                                    SUM(LENGTH(value)) OVER (
+                                        ORDER BY COALESCE(accessed, 0), rowid
+                                    ) AS running_total
+                                FROM {self.table_name}
+                            )
+                            SELECT key FROM ordered
+                            WHERE running_total - size < ?
+                            """,
+                            (excess,),
+                        )
+                    ]
+                self.bulk_delete(keys)
+                logging.info(LOG_CACHE_EVICTED.format(len(keys)))
+            self._size = self.total_size()
+            return len(keys)
+
+
+class LRUSQLiteCache(requests_cache.SQLiteCache):
+    """SQLite-кеш, размер которого не превышает max_cache_bytes."""
+
+    def __init__(self, db_path, max_cache_bytes, serializer=None, **kwargs):
+        super().__init__(db_path, serializer=serializer, **kwargs)
+        storage_options = (
+            {"serializer": serializer, **kwargs} if serializer else kwargs
+        )
+        self.responses.close()
+        self.responses = LRUSQLiteDict(
+            db_path,
+            table_name="responses",
+            max_cache_bytes=max_cache_bytes,
+            lock=self.redirects._lock,
+            **storage_options,
+        )
+
+
+def create_cache_backend(
+    backend, path, max_cache_bytes=None, compress=False
+):
+    """
+    Создаёт бэкенд кеша: sqlite, filesystem или memory.
+    Ограничение размера работает для sqlite и filesystem, сжатие —
+    для бэкендов, которые хранят ответы в файлах.
+    """
+    if backend == MEMORY_CACHE:
+        return requests_cache.BaseCache()
+    options = {}
+    if compress:
+        options["serializer"] = compressed_serializer
+    if backend == FILESYSTEM_CACHE:
+        if compress:
+            options["extension"] = COMPRESSED_CACHE_EXTENSION
+        if max_cache_bytes:
+            options["max_cache_bytes"] = max_cache_bytes
+        return requests_cache.FileCache(path, **options)
+    if max_cache_bytes:
+        return LRUSQLiteCache(path, max_cache_bytes, **options)
+    return requests_cache.SQLiteCache(path, **options)
+
+
+def create_session(args, **cache_options):
+    """
+    Создаёт кеширующую сессию.
+    Устаревшие страницы перепроверяются запросами с If-None-Match и
+    If-Modified-Since, ответ 304 отдаётся из кеша. Запросы выполняются
+    с таймаутами и повторами, частота запросов к хостам ограничена,
+    пул соединений рассчитан на число воркеров.
+    С --record ответы сохраняются в снимок, с --replay берутся из снимка
+    без обращений к сети.
+    """
+    if args.record or args.replay:
+        # Снимок должен видеть каждый запрос, поэтому ответы
+        # кешируются только в памяти на время запуска.
+        cache_options["backend"] = create_cache_backend(MEMORY_CACHE, None)
+    elif "backend" not in cache_options:
+        cache_options["backend"] = create_cache_backend(
+            args.cache_backend,
+            args.cache_path,
+            args.cache_max_size and args.cache_max_size * 1024 * 1024,
+            args.cache_compress,
+        )
+    session = requests_cache.CachedSession(
+        expire_after=CACHE_EXPIRE_AFTER,
+        urls_expire_after=URLS_EXPIRE_AFTER,
+        always_revalidate=args.revalidate,
+        stale_if_error=True,
+        **cache_options,
+    )
+    if args.replay:
+        adapter = ReplayAdapter(args.replay)
+    else:
+        adapter = RateLimitedAdapter(
+            RateLimiter(args.rate, args.burst),
+            **get_pool_options(args.workers),
+        )
+        if args.record:
+            adapter = RecordingAdapter(args.record, adapter)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.request_policy = RequestPolicy(
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        retries=args.retries,
+    )
+    if args.clear_cache:
+        session.cache.clear()
+    return session
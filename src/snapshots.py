@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import json
+import threading
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3 import HTTPResponse
+
+from constants import (
+    SNAPSHOT_CHUNK_SIZE,
+    SNAPSHOT_COMPRESSION_LEVEL,
+    SNAPSHOT_KEY_HEADERS,
+    SNAPSHOT_MANIFEST,
+    SNAPSHOT_MISSING,
+    SNAPSHOT_OBJECTS_DIR,
+    SNAPSHOT_SKIPPED_HEADERS,
+)
+from exceptions import ParserSnapshotException
+
+
+def get_snapshot_key(request):
+    """
+    Ключ записи снимка: метод, URL, диапазон байтов, если он запрошен,
+    и условия запроса, чтобы ответ 304 не подменял полный ответ.
+    """
+    key = f"{request.method} {request.url}"
+    byte_range = request.headers.get("Range")
+    if byte_range:
+        key = f"{key} {byte_range}"
+    for header in SNAPSHOT_KEY_HEADERS:
+        value = request.headers.get(header)
+        if value:
+            key = f"{key} {header}: {value}"
+    return key
+
+
+def build_snapshot_response(adapter, request, snapshot_dir, entry):
+    """Собирает ответ из записи снимка, тело читается из файла потоком."""
+    raw = HTTPResponse(
+        body=gzip.open(snapshot_dir / entry["body"], "rb"),
+        headers=entry["headers"],
+        status=entry["status"],
+        reason=entry["reason"],
+        preload_content=False,
+        decode_content=False,
+        request_method=request.method,
+    )
+    return adapter.build_response(request, raw)
+
+
+def load_manifest(snapshot_dir):
+    manifest_path = snapshot_dir / SNAPSHOT_MANIFEST
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Транспорт, который сохраняет все ответы в снимок.
+    Тела ответов записываются сжатыми потоком, без чтения в память,
+    и адресуются по SHA-256 содержимого, одинаковые тела записываются
+    один раз. Ответ отдаётся сессии уже из записанного файла. Заголовки
+    ответов на HEAD сохраняются без изменений. Индекс ответов
+    сохраняется в manifest.json при закрытии сессии.
+    """
+
+    def __init__(self, snapshot_dir, adapter=None):
+        super().__init__()
+        self.snapshot_dir = snapshot_dir
+        self.adapter = adapter or HTTPAdapter()
+        self._lock = threading.Lock()
+        self._manifest = load_manifest(snapshot_dir)
+        (snapshot_dir / SNAPSHOT_OBJECTS_DIR).mkdir(
+            parents=True, exist_ok=True
+        )
+
+    def send(self, request, **kwargs):
+        response = self.adapter.send(request, **kwargs)
+        body_path, size = self._save_body(response)
+        if request.method == "HEAD":
+            headers = dict(response.headers)
+        else:
+            headers = {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in SNAPSHOT_SKIPPED_HEADERS
+            }
+            headers["Content-Length"] = str(size)
+        entry = {
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": headers,
+            "body": body_path,
+        }
+        with self._lock:
+            self._manifest[get_snapshot_key(request)] = entry
+        return build_snapshot_response(
+            self.adapter, request, self.snapshot_dir, entry
+        )
+
+    def _save_body(self, response):
+        """Записывает тело ответа в снимок, возвращает путь и размер."""
+        part_path = (
+            self.snapshot_dir
+            / SNAPSHOT_OBJECTS_DIR
+            / f"{threading.get_ident()}.part"
+        )
+        digest = hashlib.sha256()
+        size = 0
+        with gzip.open(
+            part_path, "wb", compresslevel=SNAPSHOT_COMPRESSION_LEVEL
+        ) as file:
+            for chunk in response.iter_content(SNAPSHOT_CHUNK_SIZE):
+                file.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        digest = digest.hexdigest()
+        body_path = f"{SNAPSHOT_OBJECTS_DIR}/{digest[:2]}/{digest}.gz"
+        path = self.snapshot_dir / body_path
+        if path.exists():
+            part_path.unlink()
+        else:
+            path.parent.mkdir(exist_ok=True)
+            part_path.replace(path)
+        return body_path, size
+
+    def close(self):
+        with self._lock:
+            manifest = dict(sorted(self._manifest.items()))
+        with open(
+            self.snapshot_dir / SNAPSHOT_MANIFEST, "w", encoding="utf-8"
+        ) as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        self.adapter.close()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Транспорт, который отдаёт ответы из снимка вместо сети."""
+
+    def __init__(self, snapshot_dir):
+        super().__init__()
+        self.snapshot_dir = snapshot_dir
+        self._manifest = load_manifest(snapshot_dir)
+
+    def send(self, request, **kwargs):
+        key = get_snapshot_key(request)
+        entry = self._manifest.get(key)
+        if entry is None:
+            raise ParserSnapshotException(SNAPSHOT_MISSING.format(key))
+        return build_snapshot_response(
+            self, request, self.snapshot_dir, entry
+        )
@@ -0,0 +1,210 @@
+import json
+import sqlite3
+import threading
+
+from datetime import datetime
+
+from constants import (
+    DETAIL_TABLES,
+    EXTRACTOR_VERSIONS,
+    PARSED_PAGES_DB,
+    PEP_STATE_DB,
+    RESULT_TABLES,
+    RESULT_TOTAL_ROW,
+    RESULTS_DB,
+)
+
+CREATE_PEP_STATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS pep_state (
+        number INTEGER PRIMARY KEY,
+        url TEXT NOT NULL,
+        table_status TEXT,
+        page_status TEXT,
+        row_hash TEXT,
+        content_hash TEXT,
+        validator TEXT,
+        fetched_at TEXT
+    )
+"""
+UPSERT_PEP_STATE = """
+    INSERT INTO pep_state (
+        number, url, table_status, page_status,
+        row_hash, content_hash, validator, fetched_at
+    )
+    VALUES (
+        :number, :url, :table_status, :page_status,
+        :row_hash, :content_hash, :validator, :fetched_at
+    )
+    ON CONFLICT (number) DO UPDATE SET
+        url = excluded.url,
+        table_status = excluded.table_status,
+        page_status = excluded.page_status,
+        row_hash = excluded.row_hash,
+        content_hash = excluded.content_hash,
+        validator = excluded.validator,
+        fetched_at = excluded.fetched_at
+"""
+
+CREATE_PARSED_PAGES_TABLE = """
+    CREATE TABLE IF NOT EXISTS parsed_pages (
+        url TEXT NOT NULL,
+        extractor TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        fields TEXT NOT NULL,
+        PRIMARY KEY (url, extractor)
+    )
+"""
+UPSERT_PARSED_PAGE = """
+    INSERT INTO parsed_pages (url, extractor, version, content_hash, fields)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (url, extractor) DO UPDATE SET
+        version = excluded.version,
+        content_hash = excluded.content_hash,
+        fields = excluded.fields
+"""
+
+CREATE_RUNS_TABLE = """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        mode TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    )
+"""
+
+
+class PepStateStore:
+    """Хранит последнее известное состояние каждого PEP между запусками."""
+
+    def __init__(self, path=PEP_STATE_DB):
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.execute(CREATE_PEP_STATE_TABLE)
+
+    def load(self):
+        """Возвращает сохранённые состояния, сгруппированные по номеру PEP."""
+        rows = self.connection.execute("SELECT * FROM pep_state")
+        return {row["number"]: dict(row) for row in rows}
+
+    def save(self, states):
+        """Добавляет или обновляет состояния PEP одной транзакцией."""
+        with self.connection:
+            self.connection.executemany(UPSERT_PEP_STATE, states)
+
+    def close(self):
+        self.connection.close()
+
+
+class ParsedPagesStore:
+    """
+    Кеш полей, извлечённых из страниц.
+    Запись действительна, пока не изменились хеш содержимого страницы
+    и версия функции извлечения. Новые записи сохраняются при закрытии.
+    """
+
+    def __init__(self, path=PARSED_PAGES_DB):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._pending = []
+        with self.connection:
+            self.connection.execute(CREATE_PARSED_PAGES_TABLE)
+
+    def get(self, extractor, url, content_hash):
+        """Возвращает сохранённые поля страницы или None."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT fields FROM parsed_pages WHERE url = ? "
+                "AND extractor = ? AND version = ? AND content_hash = ?",
+                (url, extractor, EXTRACTOR_VERSIONS[extractor], content_hash),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, extractor, url, content_hash, fields):
+        """Запоминает поля страницы до закрытия хранилища."""
+        with self._lock:
+            self._pending.append(
+                (
+                    url,
+                    extractor,
+                    EXTRACTOR_VERSIONS[extractor],
+                    content_hash,
+                    json.dumps(fields, ensure_ascii=False),
+                )
+            )
+
+    def close(self):
+        with self._lock, self.connection:
+            self.connection.executemany(UPSERT_PARSED_PAGE, self._pending)
+        self._pending.clear()
+        self.connection.close()
+
+
+class ResultsStore:
+    """
+    Хранит результаты всех запусков в SQLite: по таблице на режим,
+    каждая строка привязана к запуску. Для режимов со сводными
+    результатами отдельно хранятся подробные строки, например статусы
+    каждого PEP.
+    """
+
+    def __init__(self, path=RESULTS_DB):
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(CREATE_RUNS_TABLE)
+            for table, columns, key in (
+                *RESULT_TABLES.values(),
+                *DETAIL_TABLES.values(),
+            ):
+                self._create_table(table, columns, key)
+
+    def _create_table(self, table, columns, key):
+        column_defs = ", ".join(
+            f"{column} {column_type}" for column, column_type in columns
+        )
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "run_id INTEGER NOT NULL REFERENCES runs (id), "
+            f"{column_defs}, PRIMARY KEY (run_id, {key}))"
+        )
+        self.connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_{key}_idx "
+            f"ON {table} ({key})"
+        )
+
+    def save(self, mode, rows, details=()):
+        """
+        Сохраняет строки результатов нового запуска одной транзакцией.
+        Повторы ключа в пределах запуска обновляют строку, итоговая
+        строка сводки не сохраняется. Возвращает номер запуска.
+        """
+        with self.connection:
+            run_id = self.connection.execute(
+                "INSERT INTO runs (mode, created_at) VALUES (?, ?)",
+                (mode, datetime.now().isoformat(timespec="seconds")),
+            ).lastrowid
+            self._insert(
+                run_id,
+                RESULT_TABLES[mode],
+                (row for row in rows if row[0] != RESULT_TOTAL_ROW),
+            )
+            if mode in DETAIL_TABLES:
+                self._insert(run_id, DETAIL_TABLES[mode], details)
+        return run_id
+
+    def _insert(self, run_id, table_schema, rows):
+        table, columns, key = table_schema
+        names = [column for column, _ in columns]
+        placeholders = ", ".join("?" * (len(names) + 1))
+        updates = ", ".join(
+            f"{name} = excluded.{name}" for name in names if name != key
+        )
+        self.connection.executemany(
+            f"INSERT INTO {table} (run_id, {', '.join(names)}) "
+            f"VALUES ({placeholders}) "
+            f"ON CONFLICT (run_id, {key}) DO UPDATE SET {updates}",
+            ((run_id, *row) for row in rows),
+        )
+
+    def close(self):
+        self.connection.close()
@@ -1,13 +1,32 @@
-from bs4 import BeautifulSoup
-from requests import RequestException
+import hashlib
+import sys
 
+import metrics
+
+from constants import (
+    CACHE_HIT_COUNTER,
+    CACHE_MISS_COUNTER,
+    STAGE_NETWORK,
+    STAGE_PARSE,
+)
 from exceptions import ParserFindTagException, ParserHTTPException
+from retries import get_request_policy
 
 
-def get_response(session, url):
+def get_response(session, url, **kwargs):
     """Выполняет запрос с обработкой ошибок."""
+    from requests import RequestException
+
     try:
-        response = session.get(url)
+        with metrics.stage(STAGE_NETWORK):
+            response = get_request_policy(session).request(
+                session, "GET", url, **kwargs
+            )
+        metrics.count(
+            CACHE_HIT_COUNTER
+            if getattr(response, "from_cache", False)
+            else CACHE_MISS_COUNTER
+        )
         response.encoding = "utf-8"
         return response
     except RequestException as e:
@@ -16,6 +35,11 @@ def get_response(session, url):
         )
 
 
+def get_content_hash(content):
+    """Возвращает хеш содержимого страницы."""
+    return hashlib.sha256(content).hexdigest()
+
+
 def find_tag(soup, tag, attrs=None, string=None):
     """Находит тег с обработкой ошибок."""
     searched_tag = soup.find(tag, attrs=(attrs or {}), string=string)
@@ -24,7 +48,59 @@ def find_tag(soup, tag, attrs=None, string=None):
     return searched_tag
 
 
+def parse_html(text, only=None):
+    """
+    Строит BeautifulSoup объект по тексту страницы.
+    Если передан only, в дерево попадают только теги с этим именем.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    parse_only = SoupStrainer(only) if only else None
+    with metrics.stage(STAGE_PARSE):
+        return BeautifulSoup(text, "lxml", parse_only=parse_only)
+
+
 def fetch_and_parse(session, url):
-    """Выполняет запрос и возвращает BeautifulSoup объект."""
-    response = get_response(session, url)
-    return BeautifulSoup(response.text, "lxml")
+    """
+    Выполняет запрос и возвращает BeautifulSoup объект.
+    Если у сессии есть словарь page_memo, страница разбирается один раз
+    за запуск, а повторные обращения получают готовое дерево.
+    """
+    page_memo = getattr(session, "page_memo", None)
+    if page_memo is not None and url in page_memo:
+        return page_memo[url]
+    soup = parse_html(get_response(session, url).text)
+    if page_memo is not None:
+        page_memo[url] = soup
+    return soup
+
+
+class _SilentProgress:
+    """Заглушка индикатора выполнения для запуска без терминала."""
+
+    def __init__(self, iterable=None, **kwargs):
+        self.iterable = iterable
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def update(self, n=1):
+        pass
+
+
+def progress_bar(iterable=None, **kwargs):
+    """
+    Индикатор выполнения tqdm, если stderr подключён к терминалу.
+    Без терминала tqdm не импортируется и индикатор не выводится.
+    """
+    if not sys.stderr.isatty():
+        return _SilentProgress(iterable, **kwargs)
+    from tqdm import tqdm
+
+    return tqdm(iterable, **kwargs)
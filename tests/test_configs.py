@@ -40,7 +40,7 @@ def test_configs_file():
             argparse._StoreAction,
             ["-o", "--output"],
             "output",
-            ("pretty", "file"),
+            ("pretty", "file", "jsonl", "parquet", "arrow", "sqlite"),
             "Дополнительные способы вывода данных",
         ),
     ],
@@ -71,3 +71,24 @@ def test_configure_argument_parser(
     assert got_action.help == help_str, (
         f"Укажите help-строку cli аргумента {got_action.dest}"
     )
+
+
+def test_cache_action_requires_cache_mode():
+    parser = configs.configure_argument_parser(("pep", "cache"))
+
+    assert parser.parse_args(["cache"]).cache_action == "stats", (
+        "Без действия режим `cache` должен выводить сводку"
+    )
+    assert parser.parse_args(["cache", "prune"]).cache_action == "prune"
+    with pytest.raises(SystemExit):
+        parser.parse_args(["pep", "prune"])
+
+
+def test_serve_accepts_only_result_modes():
+    parser = configs.configure_argument_parser(
+        ("pep", "download", "serve"), batch_modes=("pep", "download")
+    )
+
+    assert parser.parse_args(["serve", "--modes", "pep"]).modes == ["pep"]
+    with pytest.raises(SystemExit):
+        parser.parse_args(["serve", "--modes", "pep,download"])
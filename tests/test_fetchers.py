@@ -0,0 +1,96 @@
+import threading
+import time
+
+from requests_cache import CachedSession
+
+from conftest import PageHandler
+
+try:
+    from src import fetchers
+except ModuleNotFoundError:
+    assert False, "Убедитесь что в директории `src` есть файл `fetchers.py`"
+except ImportError:
+    assert False, "Убедитесь что в директории `src` есть файл `fetchers.py`"
+
+
+def test_fetch_concurrently_keeps_order():
+    urls = [f"https://peps.python.org/pep-{n:04d}/" for n in range(20)]
+
+    def slow_echo(url):
+        time.sleep(0.001 * (len(urls) - urls.index(url)))
+        return url
+
+    got = list(
+        fetchers.fetch_concurrently(
+            slow_echo, urls, workers=4, limiter=fetchers.HostLimiter(4)
+        )
+    )
+    assert got == urls, (
+        "Функция `fetch_concurrently` должна возвращать результаты "
+        "в порядке исходных URL"
+    )
+
+
+def test_host_limiter_caps_connections():
+    limiter = fetchers.HostLimiter(max_connections=2)
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def track(url):
+        with lock:
+            active.append(url)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(url)
+
+    urls = [f"https://peps.python.org/pep-{n:04d}/" for n in range(10)]
+    list(fetchers.fetch_concurrently(track, urls, 8, limiter))
+    assert max(peak) <= 2, (
+        "Класс `HostLimiter` должен ограничивать число одновременных "
+        "запросов к одному хосту"
+    )
+
+
+def test_fetch_pages_uses_cache(local_server):
+    session = CachedSession(backend="memory", cache_control=True)
+    urls = [f"{local_server}/pep-{n:04d}/" for n in range(10)]
+
+    def get_text(session, url):
+        return session.get(url).text
+
+    for _ in range(2):
+        got = list(fetchers.fetch_pages(session, get_text, urls, 4))
+        assert got == [f"<h1>/pep-{n:04d}/</h1>" for n in range(10)], (
+            "Функция `fetch_pages` должна возвращать страницы "
+            "в исходном порядке"
+        )
+    assert len(PageHandler.hits) == len(urls), (
+        "Функция `fetch_pages` должна использовать кеш сессии"
+    )
+
+
+def test_rate_limiter_spaces_requests_after_burst(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(fetchers.time, "monotonic", lambda: clock[0])
+
+    def sleep(delay):
+        clock[0] += delay
+
+    monkeypatch.setattr(fetchers.time, "sleep", sleep)
+    limiter = fetchers.RateLimiter(rate=10, burst=2)
+    url = "https://peps.python.org/pep-0008/"
+    for _ in range(4):
+        limiter.acquire(url)
+    assert round(clock[0], 3) == 0.2, (
+        "После всплеска запросы к хосту должны идти с заданной частотой"
+    )
+
+    limiter.observe(url, 429)
+    started = clock[0]
+    limiter.acquire(url)
+    assert clock[0] - started > 0.1, (
+        "Ответ 429 должен снижать частоту запросов к хосту"
+    )
+
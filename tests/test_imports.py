@@ -0,0 +1,72 @@
+import json
+import subprocess
+import sys
+
+from conftest import SRC_DIR
+
+# Модули, которые должны загружаться только режимами и выводами,
+# которым они нужны
+LAZY_MODULES = (
+    "requests",
+    "urllib3",
+    "bs4",
+    "lxml",
+    "prettytable",
+    "requests_cache",
+    "tqdm",
+    "multiprocessing",
+    "http.server",
+    "cProfile",
+)
+# Импорт main без сетевого стека должен быть быстрее одного requests
+IMPORT_TIME_RATIO = 1
+IMPORT_TIME_RUNS = 3
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def get_import_times(module):
+    """Суммарное время импорта модулей по выводу `python -X importtime`."""
+    stderr = run_python("-X", "importtime", "-c", f"import {module}").stderr
+    times = {}
+    for line in stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times.setdefault(name.strip(), int(cumulative))
+    return times
+
+
+def test_main_import_defers_heavy_modules():
+    loaded = json.loads(
+        run_python(
+            "-c",
+            "import json, sys, main; print(json.dumps(sorted(sys.modules)))",
+        ).stdout
+    )
+    assert not set(LAZY_MODULES) & set(loaded), (
+        "Модуль `main.py` не должен импортировать при загрузке "
+        f"{sorted(set(LAZY_MODULES) & set(loaded))}"
+    )
+
+
+def test_main_import_time():
+    main_time = min(
+        get_import_times("main")["main"] for _ in range(IMPORT_TIME_RUNS)
+    )
+    requests_time = min(
+        get_import_times("requests")["requests"]
+        for _ in range(IMPORT_TIME_RUNS)
+    )
+    assert main_time <= requests_time * IMPORT_TIME_RATIO, (
+        f"Импорт `main` занимает {main_time} мкс, импорт requests — "
+        f"{requests_time} мкс: проверьте, что тяжёлые зависимости "
+        "импортируются лениво"
+    )
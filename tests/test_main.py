@@ -1,6 +1,11 @@
+import json
+
+from argparse import Namespace
+from contextlib import closing
 from pathlib import Path
 
 import pytest
+import requests_mock
 
 try:
     from src import main
@@ -143,3 +148,470 @@ def test_mode_to_function():
             "В модуле `main.py` в объекте `MODE_TO_FUNCTION` "
             f"нет значения {func}"
         )
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        '<dl class="rfc2822 field-list simple"><dt>Author:</dt><dd>G</dd>'
+        "<dt>Status:</dt><dd><abbr>Final</abbr></dd></dl><p>text</p>",
+        "<dl><dt>Status:</dt><dd>Final</dd></dl>",
+    ],
+)
+def test_parse_pep_status(html):
+    assert main.parse_pep_status(html) == "Final", (
+        "Функция `parse_pep_status` должна находить статус как в блоке "
+        "заголовков PEP, так и на странице без него"
+    )
+
+
+def test_download_file_resumes_partial(tmp_path, mock_session):
+    url = "mock://docs.python.org/3/archives/python-docs-pdf-a4.zip"
+    mock_session.mock_adapter.register_uri(
+        "GET", url, content=b"-tail", status_code=206
+    )
+    (tmp_path / "python-docs-pdf-a4.zip.part").write_bytes(b"head")
+    (tmp_path / "python-docs-pdf-a4.zip.part.validator").write_text('"v1"')
+    main._download_file(mock_session, url, tmp_path)
+
+    request = mock_session.mock_adapter.last_request
+    assert request.headers["Range"] == "bytes=4-", (
+        "Недокачанный файл должен дозагружаться запросом с заголовком Range"
+    )
+    assert request.headers["If-Range"] == '"v1"', (
+        "Дозагрузка должна проверять сборку файла заголовком If-Range"
+    )
+    assert (tmp_path / "python-docs-pdf-a4.zip").read_bytes() == b"head-tail"
+    assert not (tmp_path / "python-docs-pdf-a4.zip.part").exists()
+    assert not (tmp_path / "python-docs-pdf-a4.zip.part.validator").exists()
+
+
+def test_download_file_restarts_changed_partial(tmp_path, mock_session):
+    url = "mock://docs.python.org/3/archives/python-docs-pdf-a4.zip"
+    builds = {'"v1"': b"old-build", '"v2"': b"new-build"}
+    current = {"etag": '"v1"'}
+
+    def archive(request, context):
+        etag = current["etag"]
+        body = builds[etag]
+        context.headers["ETag"] = etag
+        byte_range = request.headers.get("Range")
+        if_range = request.headers.get("If-Range", etag)
+        if byte_range and if_range == etag:
+            context.status_code = 206
+            return body[int(byte_range[6:-1]):]
+        return body
+
+    def interrupted(request, context):
+        context.headers["ETag"] = current["etag"]
+        context.headers["Content-Length"] = "9"
+        return b"old-"
+
+    mock_session.mock_adapter.register_uri("GET", url, content=interrupted)
+    with pytest.raises(main.ParserHTTPException):
+        main._download_file(mock_session, url, tmp_path)
+    current["etag"] = '"v2"'
+    mock_session.mock_adapter.register_uri("GET", url, content=archive)
+    main._download_file(mock_session, url, tmp_path)
+
+    assert (tmp_path / "python-docs-pdf-a4.zip").read_bytes() == (
+        b"new-build"
+    ), (
+        "Часть файла от прежней сборки не должна дополняться "
+        "концом новой сборки"
+    )
+
+
+def test_download_keeps_finished_files(monkeypatch, tmp_path, mock_session):
+    monkeypatch.setattr(main, "BASE_DIR", tmp_path)
+    docs_url = "https://docs.python.org/3.12/"
+    archives = f"{docs_url}archives/"
+    adapter = requests_mock.Adapter()
+    adapter.register_uri(
+        "GET",
+        f"{docs_url}download.html",
+        text="<table class='docutils'>"
+        "<a href='archives/python-3.12-docs-pdf-a4.zip'>pdf</a>"
+        "<a href='archives/python-3.12-docs.epub'>epub</a></table>",
+    )
+    adapter.register_uri(
+        "HEAD", requests_mock.ANY, headers={"ETag": '"v1"'}
+    )
+    adapter.register_uri(
+        "GET", f"{archives}python-3.12-docs-pdf-a4.zip", content=b"pdf"
+    )
+    adapter.register_uri(
+        "GET", f"{archives}python-3.12-docs.epub", status_code=404
+    )
+    mock_session.mount("https://", adapter)
+
+    with pytest.raises(main.ParserHTTPException, match="epub"):
+        main.download(
+            mock_session,
+            workers=1,
+            formats=("pdf-a4", "epub", "text"),
+            versions=["3.12"],
+        )
+    downloads = tmp_path / "downloads"
+    etags = json.loads((downloads / ".etags.json").read_text())
+
+    assert (downloads / "python-3.12-docs-pdf-a4.zip").read_bytes() == (
+        b"pdf"
+    ), "Ошибка загрузки одного архива не должна прерывать остальные"
+    assert etags == {"python-3.12-docs-pdf-a4.zip": '"v1"'}, (
+        "ETag скачанных архивов должны сохраняться, даже если другой "
+        "архив загрузить не удалось"
+    )
+
+
+def test_get_docs_urls(monkeypatch):
+    monkeypatch.setattr(
+        main,
+        "latest_versions",
+        lambda session: [
+            ("Версия", "Статус", "Ссылка"),
+            ("3.13", "in development", "https://docs.python.org/3.13/"),
+            ("All versions", "", "https://www.python.org/doc/versions/"),
+        ],
+    )
+
+    assert main._get_docs_urls(None, None) == [main.MAIN_DOC_URL]
+    assert main._get_docs_urls(None, ["3.12"]) == [
+        "https://docs.python.org/3.12/"
+    ], "Адрес документации должен строиться по номеру версии"
+    assert main._get_docs_urls(None, ["all"]) == [
+        "https://docs.python.org/3.13/"
+    ], "Для всех версий должны браться только ссылки с номером версии"
+
+
+@pytest.mark.parametrize(
+    "content, etag, size, known_etag, expected",
+    [
+        (b"zip", '"v1"', "3", '"v1"', True),
+        (b"zip", '"v2"', "3", '"v1"', False),
+        (b"zip", None, "3", None, True),
+        (b"zi", '"v1"', "3", '"v1"', False),
+        (None, '"v1"', "3", '"v1"', False),
+        (b"zip", '"v1"', None, '"v1"', False),
+    ],
+)
+def test_is_unchanged(tmp_path, content, etag, size, known_etag, expected):
+    file_path = tmp_path / "python-docs-pdf-a4.zip"
+    if content is not None:
+        file_path.write_bytes(content)
+
+    assert main._is_unchanged(file_path, etag, size, known_etag) is (
+        expected
+    ), "Файл пропускается, только если совпадают размер и ETag"
+
+
+def test_parse_pep_rows():
+    soup = main.parse_html(
+        "<table><tbody><tr><td><abbr title='Standards Track, Final'>SF"
+        "</abbr></td><td><a href='pep-0008/'>8</a></td>"
+        "<td>Style Guide</td><td>GvR</td><td></td></tr></tbody></table>"
+    )
+    errors = []
+    (record,) = main._parse_pep_rows(soup.select("tbody tr"), errors)
+
+    assert not errors
+    assert (record.number, record.type, record.status_code) == (
+        8, "S", "F"
+    ), "Строка таблицы PEP должна разбираться в запись PepRecord"
+    assert record.title == "Style Guide"
+    assert record.table_status == "Standards Track, Final"
+    assert record.page_status is None
+    assert record.url.endswith("/pep-0008/")
+
+
+def get_pep_index(rows):
+    return (
+        "<section id='numerical-index'><table><tbody>"
+        + "".join(
+            f"<tr><td><abbr title='{title}'>{code}</abbr></td>"
+            f"<td><a href='pep-{number:04d}/'>{number}</a></td>"
+            "<td>t</td><td>a</td><td></td></tr>"
+            for number, title, code in rows
+        )
+        + "</tbody></table></section>"
+    )
+
+
+PEP_ROWS = [
+    (1, "Process, Active", "PA"),
+    (8, "Process, Active", "PA"),
+    (3000, "Standards Track, Final", "SF"),
+]
+PEP_INDEX = get_pep_index(PEP_ROWS)
+
+
+def test_pep_verify_none_uses_index_only(mock_session):
+    adapter = requests_mock.Adapter()
+    adapter.register_uri("GET", main.PEP_URL, text=PEP_INDEX)
+    mock_session.mount("https://", adapter)
+
+    got = main.pep(mock_session, verify="none")
+
+    assert got == [
+        ("Статус", "Количество"),
+        ("Active", 2),
+        ("Final", 1),
+        ("Total", 3),
+    ], "При --verify none статусы должны считаться по таблице PEP"
+    assert adapter.call_count == 1, (
+        "При --verify none страницы отдельных PEP загружаться не должны"
+    )
+
+
+def test_sample_pep_records_covers_every_status():
+    soup = main.parse_html(PEP_INDEX)
+    records = main._parse_pep_rows(soup.select("tbody tr"), [])
+
+    sample = main._sample_pep_records(records, size=1)
+
+    assert [record.number for record in sample] in ([1, 3000], [8, 3000]), (
+        "Выборка PEP должна включать хотя бы один PEP каждого статуса"
+    )
+
+
+def test_pep_from_api(mock_session):
+    adapter = requests_mock.Adapter()
+    adapter.register_uri("GET", main.PEP_URL, text=PEP_INDEX)
+    adapter.register_uri(
+        "GET",
+        main.PEP_API_URL,
+        content=(
+            Path(__file__).parent / "fixture_data" / "peps.json"
+        ).read_bytes(),
+        headers={"Content-Type": "application/json"},
+    )
+    mock_session.mount("https://", adapter)
+
+    got = main.pep(mock_session, source="api")
+
+    assert got == [
+        ("Статус", "Количество"),
+        ("Active", 2),
+        ("Final", 1),
+        ("Total", 3),
+    ], "При --source api статусы должны считаться по данным API"
+    assert adapter.call_count == 2, (
+        "При --source api страницы отдельных PEP загружаться не должны"
+    )
+
+
+def test_pep_api_falls_back_to_html(mock_session):
+    adapter = requests_mock.Adapter()
+    adapter.register_uri("GET", main.PEP_URL, text=PEP_INDEX)
+    adapter.register_uri("GET", main.PEP_API_URL, status_code=503)
+    mock_session.mount("https://", adapter)
+
+    got = main.pep(mock_session, verify="none", source="api")
+
+    assert got[-1] == ("Total", 3), (
+        "Если API недоступно, статусы должны браться из HTML"
+    )
+
+
+def test_run_batch_shares_parsed_pages(monkeypatch, capsys, mock_session):
+    soups = []
+
+    def parse_index(session, stream=False):
+        soups.append(main.fetch_and_parse(session, main.MAIN_DOC_URL))
+        return [("Режим",), (len(soups),)]
+
+    def broken(session):
+        raise main.ParserFindTagException("Не найден тег")
+
+    adapter = requests_mock.Adapter()
+    adapter.register_uri("GET", main.MAIN_DOC_URL, text="<h1>Python</h1>")
+    mock_session.mount("https://", adapter)
+    monkeypatch.setattr(
+        main,
+        "MODE_TO_FUNCTION",
+        {"first": parse_index, "broken": broken, "second": parse_index},
+    )
+    args = Namespace(
+        mode="all", modes=None, output=None, workers=2, profile=False
+    )
+
+    with pytest.raises(main.ParserBatchException, match="broken"):
+        main.run_parser(mock_session, args)
+
+    assert capsys.readouterr().out.split() == ["Режим", "1", "Режим", "2"], (
+        "Пакетный запуск должен выводить результаты каждого режима, "
+        "даже если один из режимов завершился ошибкой"
+    )
+    assert soups[0] is soups[1], (
+        "Страница должна разбираться один раз за пакетный запуск"
+    )
+    assert not hasattr(mock_session, "page_memo"), (
+        "Разобранные страницы не должны переживать пакетный запуск"
+    )
+
+
+def test_watch_emits_changes(capsys, mock_session):
+    changed_index = get_pep_index(
+        [
+            (1, "Process, Active", "PA"),
+            (8, "Process, Withdrawn", "PW"),
+            (3000, "Standards Track, Final", "SF"),
+            (3001, "Standards Track, Draft", "SD"),
+        ]
+    )
+    adapter = requests_mock.Adapter()
+    adapter.register_uri(
+        "GET",
+        main.PEP_URL,
+        [{"text": PEP_INDEX}, {"text": PEP_INDEX}, {"text": changed_index}],
+    )
+    adapter.register_uri("GET", main.MAIN_DOC_URL, text="<h1>Python</h1>")
+    mock_session.mount("https://", adapter)
+
+    main.watch(mock_session, interval=0, polls=3)
+
+    events = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    assert [
+        (event["event"], event["number"], event["status"])
+        for event in events
+    ] == [
+        ("pep_status_changed", 8, "Withdrawn"),
+        ("new_pep", 3001, "Draft"),
+    ], "Режим watch должен сообщать только об изменениях с прошлого опроса"
+    assert events[0]["old_status"] == "Active"
+
+
+def mount_pep_pages(session, index, pages, fetched):
+    """Подключает таблицу PEP и страницы PEP, отвечающие 304 по ETag."""
+
+    def pep_page(number):
+        def callback(request, context):
+            etag, status = pages[number]
+            context.headers["ETag"] = etag
+            if request.headers.get("If-None-Match") == etag:
+                context.status_code = 304
+                return ""
+            fetched.append(number)
+            return f"<dl><dt>Status:</dt><dd>{status}</dd></dl>"
+
+        return callback
+
+    adapter = requests_mock.Adapter()
+    adapter.register_uri(
+        "GET", main.PEP_URL, text=lambda request, context: index[0]
+    )
+    for number in pages:
+        adapter.register_uri(
+            "GET",
+            f"{main.PEP_URL}pep-{number:04d}/",
+            text=pep_page(number),
+        )
+    session.mount("https://", adapter)
+
+
+def test_incremental_pep_revalidates_unchanged_rows(
+    monkeypatch, tmp_path, mock_session
+):
+    monkeypatch.setattr(main, "PEP_STATE_DB", tmp_path / "state.sqlite3")
+    monkeypatch.setattr(main, "PARSED_PAGES_DB", tmp_path / "pages.sqlite3")
+    pages = {number: ('"v1"', "Active") for number, _, _ in PEP_ROWS}
+    pages[3000] = ('"v1"', "Final")
+    fetched = []
+    mount_pep_pages(mock_session, [PEP_INDEX], pages, fetched)
+
+    main.pep(mock_session, workers=1, incremental=True)
+    pages[8] = ('"v2"', "Withdrawn")
+    fetched.clear()
+    got = main.pep(mock_session, workers=1, incremental=True)
+
+    assert fetched == [8], (
+        "В режиме `--incremental` заново должны загружаться только "
+        "изменившиеся страницы PEP, даже если строка таблицы не изменилась"
+    )
+    assert ("Withdrawn", 1) in got, (
+        "Статус изменившейся страницы PEP должен попасть в результаты"
+    )
+    assert (8, "Withdrawn") in [
+        (number, page_status) for number, _, page_status, _ in got.details
+    ], "Результаты режима pep должны содержать статус каждого PEP"
+
+
+def test_incremental_pep_refreshes_changed_rows(
+    monkeypatch, tmp_path, mock_session
+):
+    monkeypatch.setattr(main, "PEP_STATE_DB", tmp_path / "state.sqlite3")
+    monkeypatch.setattr(main, "PARSED_PAGES_DB", tmp_path / "pages.sqlite3")
+    pages = {number: ('"v1"', "Active") for number, _, _ in PEP_ROWS}
+    pages[3000] = ('"v1"', "Final")
+    index = [PEP_INDEX]
+    mount_pep_pages(mock_session, index, pages, [])
+
+    main.pep(mock_session, workers=1, incremental=True)
+    rows = [*PEP_ROWS]
+    rows[1] = (8, "Process, Withdrawn", "PW")
+    index[0] = get_pep_index(rows)
+    pages[8] = ('"v2"', "Withdrawn")
+    mock_session.cache.delete(urls=[main.PEP_URL])
+    got = main.pep(mock_session, workers=1, incremental=True)
+
+    assert ("Withdrawn", 1) in got, (
+        "В режиме `--incremental` страница PEP с изменившейся строкой "
+        "таблицы не должна браться из кеша сессии без перепроверки"
+    )
+
+
+def test_failed_article_parse_is_not_cached(tmp_path, caplog):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    from src import storage
+
+    class Executor:
+        def submit(self, *args):
+            self.future = Future()
+            return self.future
+
+    executor = Executor()
+    parsed_pages = storage.ParsedPagesStore(tmp_path / "pages.sqlite3")
+    future = main._parse_article(
+        "https://docs.python.org/3/whatsnew/3.12.html",
+        ("<h1>What's New</h1>", "hash", None),
+        parsed_pages,
+        executor,
+    )
+    executor.future.set_exception(BrokenProcessPool())
+    parsed_pages.close()
+
+    with pytest.raises(BrokenProcessPool):
+        future.result()
+    assert "exception calling callback" not in caplog.text, (
+        "Ошибка разбора в пуле процессов не должна падать "
+        "в обработчике завершения"
+    )
+
+
+def test_parse_articles_in_processes_keeps_order(tmp_path):
+    from src import storage
+
+    links = [
+        f"https://docs.python.org/3/whatsnew/3.{minor}.html"
+        for minor in range(8)
+    ]
+    pages = [
+        (
+            f"<h1>3.{minor}</h1><dl>Editor {minor}</dl>" + "<p>x</p>" * minor,
+            f"hash-{minor}",
+            None,
+        )
+        for minor in range(8)
+    ]
+    parsed_pages = storage.ParsedPagesStore(tmp_path / "pages.sqlite3")
+    with closing(parsed_pages):
+        got = list(main._parse_articles(zip(links, pages), 2, parsed_pages))
+
+    assert got == [
+        ((link, f"3.{minor}", f"Editor {minor}"), None)
+        for minor, link in enumerate(links)
+    ], "Статьи, разобранные в пуле процессов, должны идти в порядке toctree"
@@ -0,0 +1,33 @@
+try:
+    from src import metrics
+except ModuleNotFoundError:
+    assert False, "Убедитесь что в директории `src` есть файл `metrics.py`"
+except ImportError:
+    assert False, "Убедитесь что в директории `src` есть файл `metrics.py`"
+
+
+def test_metrics_disabled_by_default():
+    metrics.reset()
+    with metrics.stage("network"):
+        metrics.count("cache_hits")
+    assert metrics.get_summary() == [metrics.METRICS_HEADER], (
+        "Без флага `--profile` замеры не должны собираться"
+    )
+    assert metrics.get_counters() == {}
+
+
+def test_metrics_summary(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    metrics.reset()
+    for _ in range(3):
+        with metrics.stage("parse"):
+            pass
+    metrics.count("cache_hits", 3)
+    metrics.count("cache_misses")
+    summary = metrics.get_summary()
+    metrics.reset()
+
+    assert summary[1][:2] == ("parse", 3), (
+        "Сводка должна содержать число вызовов каждого этапа"
+    )
+    assert len(summary[1]) == len(metrics.METRICS_HEADER)
@@ -1,3 +1,5 @@
+import json
+
 from argparse import Namespace
 from datetime import datetime
 from pathlib import Path
@@ -103,3 +105,48 @@ def test_output_file():
     assert hasattr(outputs, "file_output"), (
         "Напишите функцию `file_output` в модуле `output.py`"
     )
+
+
+def test_control_output_consumes_generator(monkeypatch, tmp_path, records):
+    monkeypatch.setattr(outputs, "BASE_DIR", Path(tmp_path))
+    rows = records("latest-versions")
+    outputs.control_output(
+        (row for row in rows), cli_args("latest-versions", "file")
+    )
+    output_file = next(Path(tmp_path).glob("results/*.csv"))
+    lines = output_file.read_text(encoding="utf-8-sig").splitlines()
+    assert len(lines) == len(rows), (
+        "Функция `file_output` должна записывать строки, "
+        "полученные из генератора"
+    )
+
+
+def test_jsonl_output(monkeypatch, tmp_path, records):
+    monkeypatch.setattr(outputs, "BASE_DIR", Path(tmp_path))
+    rows = records("pep")
+    outputs.control_output(rows, cli_args("pep", "jsonl"))
+    output_file = next(Path(tmp_path).glob("results/pep_*.jsonl"))
+    lines = output_file.read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[0]) == dict(zip(rows[0], rows[1])), (
+        "Каждая строка JSON Lines должна быть объектом с ключами из заголовка"
+    )
+    assert len(lines) == len(rows) - 1
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_columnar_output_types(monkeypatch, tmp_path, output_format):
+    pa = pytest.importorskip("pyarrow")
+    monkeypatch.setattr(outputs, "BASE_DIR", Path(tmp_path))
+    rows = [("Статус", "Количество"), ("Active", 3), ("Total", 3)]
+    outputs.control_output(rows, cli_args("pep", output_format))
+    output_file = next(Path(tmp_path).glob(f"results/pep_*.{output_format}"))
+    if output_format == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(output_file)
+    else:
+        table = pa.ipc.open_file(output_file).read_all()
+    assert table.schema.field("Количество").type == pa.int64(), (
+        "Столбцы из целых чисел должны сохраняться с типом int64"
+    )
+    assert table.column("Статус").to_pylist() == ["Active", "Total"]
@@ -0,0 +1,79 @@
+import pytest
+import requests
+
+from requests_mock import Adapter
+
+try:
+    from src import retries
+except ModuleNotFoundError:
+    assert False, "Убедитесь что в директории `src` есть файл `retries.py`"
+except ImportError:
+    assert False, "Убедитесь что в директории `src` есть файл `retries.py`"
+
+URL = "https://peps.python.org/pep-0008/"
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    slept = []
+    monkeypatch.setattr(retries.time, "sleep", slept.append)
+    return slept
+
+
+@pytest.fixture
+def adapter_session():
+    session = requests.Session()
+    adapter = Adapter()
+    session.mount("https://", adapter)
+    session.mock_adapter = adapter
+    return session
+
+
+def test_retries_honor_retry_after(adapter_session, delays):
+    adapter_session.mock_adapter.register_uri(
+        "GET",
+        URL,
+        [
+            {"status_code": 503, "headers": {"Retry-After": "7"}},
+            {"exc": requests.exceptions.ConnectTimeout},
+            {"status_code": 200, "text": "ok"},
+        ],
+    )
+    policy = retries.RequestPolicy(retries=3, backoff_base=1)
+
+    response = policy.request(adapter_session, "GET", URL)
+
+    assert response.text == "ok", (
+        "После временных сбоев запрос должен повторяться до успеха"
+    )
+    assert delays[0] == 7, "Задержка повтора должна учитывать Retry-After"
+    assert 0 <= delays[1] <= 2, (
+        "Задержка повтора должна расти экспоненциально со случайным разбросом"
+    )
+    assert adapter_session.mock_adapter.last_request.timeout == policy.timeout
+
+
+def test_retries_return_last_response(adapter_session, delays):
+    adapter_session.mock_adapter.register_uri("GET", URL, status_code=502)
+    policy = retries.RequestPolicy(retries=2)
+
+    assert policy.request(adapter_session, "GET", URL).status_code == 502
+    assert adapter_session.mock_adapter.call_count == 3
+
+
+def test_circuit_breaker_fails_fast(adapter_session, delays):
+    adapter_session.mock_adapter.register_uri(
+        "GET", URL, exc=requests.exceptions.ConnectionError
+    )
+    policy = retries.RequestPolicy(
+        retries=0, breaker=retries.CircuitBreaker(failure_threshold=2)
+    )
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            policy.request(adapter_session, "GET", URL)
+
+    with pytest.raises(retries.ParserCircuitOpenException):
+        policy.request(adapter_session, "GET", URL)
+    assert adapter_session.mock_adapter.call_count == 2, (
+        "После серии сбоев запросы к хосту не должны отправляться"
+    )
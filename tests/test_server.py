@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+import requests
+
+try:
+    from src import server
+except ModuleNotFoundError:
+    assert False, "Убедитесь что в директории `src` есть файл `server.py`"
+except ImportError:
+    assert False, "Убедитесь что в директории `src` есть файл `server.py`"
+
+
+@pytest.fixture
+def results_server():
+    results = server.ResultsCache()
+    http_server = server.ResultsServer(("127.0.0.1", 0), results)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield results, f"http://127.0.0.1:{http_server.server_port}"
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def test_results_server(results_server):
+    results, url = results_server
+    results.update("pep", [("Статус", "Количество"), ("Final", 1)])
+
+    response = requests.get(f"{url}/pep")
+    assert response.status_code == 200
+    assert response.json() == [{"Статус": "Final", "Количество": 1}], (
+        "Сервер должен отдавать строки результатов как JSON-объекты"
+    )
+    assert "pep" in requests.get(url).json(), (
+        "Корневой адрес должен перечислять режимы с результатами"
+    )
+
+    etag = response.headers["ETag"]
+    not_modified = requests.get(f"{url}/pep", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304, (
+        "При совпадении If-None-Match сервер должен отвечать 304"
+    )
+
+    results.update("pep", [("Статус", "Количество"), ("Final", 2)])
+    changed = requests.get(f"{url}/pep", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag, (
+        "После обновления результатов ETag должен измениться"
+    )
+
+    assert requests.get(f"{url}/whats-new").status_code == 404
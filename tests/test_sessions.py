@@ -0,0 +1,123 @@
+from argparse import Namespace
+
+from conftest import PageHandler
+
+try:
+    from src import sessions
+except ModuleNotFoundError:
+    assert False, "Убедитесь что в директории `src` есть файл `sessions.py`"
+except ImportError:
+    assert False, "Убедитесь что в директории `src` есть файл `sessions.py`"
+
+def session_args(**options):
+    return Namespace(
+        **{
+            "clear_cache": False,
+            "revalidate": False,
+            "connect_timeout": 5,
+            "read_timeout": 30,
+            "retries": 0,
+            "rate": 100,
+            "burst": 10,
+            "workers": 8,
+            "record": None,
+            "replay": None,
+            **options,
+        }
+    )
+
+
+# Примерный размер одного ответа тестового сервера в базе кеша, байт
+RESPONSE_SIZE = 600
+
+
+def test_revalidate_serves_not_modified_from_cache(local_server):
+    session = sessions.create_session(
+        session_args(revalidate=True), backend="memory"
+    )
+    url = f"{local_server}/pep-0008/"
+    first = session.get(url)
+    second = session.get(url)
+
+    assert PageHandler.hits == ["/pep-0008/", "/pep-0008/"], (
+        "В режиме `--revalidate` каждая страница должна "
+        "перепроверяться условным запросом"
+    )
+    assert second.from_cache, "Ответ 304 должен отдаваться из кеша"
+    assert second.text == first.text
+
+
+def test_connection_pool_matches_workers():
+    session = sessions.create_session(session_args(), backend="memory")
+    adapter = session.get_adapter("https://")
+
+    assert adapter.poolmanager.connection_pool_kw["maxsize"] == 8, (
+        "Пул keep-alive соединений сессии должен вмещать "
+        "соединения всех воркеров"
+    )
+    assert session.get_adapter("http://") is adapter
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path, local_server):
+    backend = sessions.create_cache_backend(
+        "sqlite", tmp_path / "http_cache", max_cache_bytes=RESPONSE_SIZE * 3
+    )
+    session = sessions.create_session(
+        session_args(), backend=backend
+    )
+    for path in ("/a/", "/b/", "/c/", "/a/", "/d/"):
+        session.get(f"{local_server}{path}")
+
+    cached = {response.url for response in session.cache.responses.values()}
+    assert backend.responses.total_size() <= RESPONSE_SIZE * 3, (
+        "Размер кеша не должен превышать заданный предел"
+    )
+    assert f"{local_server}/a/" in cached, (
+        "Недавно использованный ответ не должен вытесняться из кеша"
+    )
+    assert f"{local_server}/b/" not in cached, (
+        "Из кеша должен вытесняться давно не использованный ответ"
+    )
+
+
+def test_sqlite_cache_batches_access_times(tmp_path, local_server):
+    import sqlite3
+    import time
+
+    path = tmp_path / "http_cache"
+    backend = sessions.create_cache_backend(
+        "sqlite", path, max_cache_bytes=RESPONSE_SIZE * 10
+    )
+    session = sessions.create_session(session_args(), backend=backend)
+
+    def get_accessed():
+        with sqlite3.connect(f"{path}.sqlite") as con:
+            return con.execute("SELECT accessed FROM responses").fetchone()
+
+    session.get(f"{local_server}/a/")
+    written = get_accessed()
+    time.sleep(0.01)
+    assert session.get(f"{local_server}/a/").from_cache
+    assert get_accessed() == written, (
+        "Чтение из кеша не должно сразу записывать время обращения"
+    )
+    session.close()
+    assert get_accessed() > written, (
+        "Накопленные времена обращений должны записываться при закрытии"
+    )
+
+
+def test_compressed_cache(tmp_path, local_server):
+    url = f"{local_server}/pep-0008/"
+    session = sessions.create_session(
+        session_args(),
+        backend=sessions.create_cache_backend(
+            "sqlite", tmp_path / "http_cache", compress=True
+        ),
+    )
+    first = session.get(url)
+    second = session.get(url)
+
+    assert second.from_cache, "Сжатый ответ должен отдаваться из кеша"
+    assert second.text == first.text
+    assert PageHandler.hits == ["/pep-0008/"]
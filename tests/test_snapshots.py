@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from conftest import PageHandler
+from test_sessions import session_args
+
+try:
+    from src import sessions, snapshots
+except ModuleNotFoundError:
+    assert False, "Убедитесь что в директории `src` есть файл `snapshots.py`"
+except ImportError:
+    assert False, "Убедитесь что в директории `src` есть файл `snapshots.py`"
+
+
+def test_record_and_replay(tmp_path, local_server):
+    paths = ("/pep-0008/", "/pep-0020/", "/pep-0008/")
+    with sessions.create_session(session_args(record=tmp_path)) as session:
+        recorded = [session.get(f"{local_server}{path}").text for path in paths]
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert set(manifest) == {
+        f"GET {local_server}/pep-0008/",
+        f"GET {local_server}/pep-0020/",
+    }, "В индексе снимка должна быть одна запись на каждый запрос"
+    assert len(list(tmp_path.glob("objects/*/*.gz"))) == 2, (
+        "Тела ответов должны храниться сжатыми по хешу содержимого"
+    )
+
+    PageHandler.hits = []
+    with sessions.create_session(session_args(replay=tmp_path)) as session:
+        replayed = [session.get(f"{local_server}{path}").text for path in paths]
+        with pytest.raises(snapshots.ParserSnapshotException):
+            session.get(f"{local_server}/pep-0001/")
+
+    assert replayed == recorded, "Ответы из снимка должны совпадать с записью"
+    assert PageHandler.hits == [], (
+        "При воспроизведении снимка запросы не должны уходить в сеть"
+    )
+
+
+def test_replay_keeps_head_and_conditional_responses(tmp_path, local_server):
+    url = f"{local_server}/pep-0008/"
+    etag = f'"{len("/pep-0008/")}"'
+    conditional = {"If-None-Match": etag}
+    with sessions.create_session(
+        session_args(record=tmp_path), backend="memory"
+    ) as session:
+        head = session.head(url)
+        session.get(url, headers=conditional)
+        with session.get(url, stream=True) as response:
+            recorded = b"".join(response.iter_content(4))
+
+    with sessions.create_session(
+        session_args(replay=tmp_path), backend="memory"
+    ) as session:
+        replayed_head = session.head(url)
+        not_modified = session.get(url, headers=conditional)
+        replayed = session.get(url)
+
+    assert recorded == b"<h1>/pep-0008/</h1>", (
+        "При записи снимка тело ответа должно читаться потоком"
+    )
+    assert replayed_head.headers == head.headers, (
+        "Заголовки ответа на HEAD должны сохраняться в снимке без изменений"
+    )
+    assert not_modified.status_code == 304, (
+        "Ответ на условный запрос должен храниться под своим ключом"
+    )
+    assert (replayed.status_code, replayed.content) == (200, recorded), (
+        "Ответ 304 не должен воспроизводиться для безусловного запроса"
+    )
@@ -0,0 +1,107 @@
+try:
+    from src import storage
+except ModuleNotFoundError:
+    assert False, "Убедитесь что в директории `src` есть файл `storage.py`"
+except ImportError:
+    assert False, "Убедитесь что в директории `src` есть файл `storage.py`"
+
+
+def pep_state(number, page_status):
+    return {
+        "number": number,
+        "url": f"https://peps.python.org/pep-{number:04d}/",
+        "table_status": "Process, Active",
+        "page_status": page_status,
+        "row_hash": "row",
+        "content_hash": "content",
+        "validator": None,
+        "fetched_at": "2025-04-24T19:59:12",
+    }
+
+
+def test_pep_state_store_upserts(tmp_path):
+    store = storage.PepStateStore(tmp_path / "state.sqlite3")
+    store.save([pep_state(1, "Active"), pep_state(8, "Active")])
+    store.save([pep_state(8, "Final")])
+    got = store.load()
+    store.close()
+
+    assert sorted(got) == [1, 8], (
+        "Класс `PepStateStore` должен хранить по одной записи на PEP"
+    )
+    assert got[8]["page_status"] == "Final", (
+        "Повторное сохранение PEP должно обновлять запись"
+    )
+
+
+def test_results_store_keeps_history(tmp_path):
+    store = storage.ResultsStore(tmp_path / "results.sqlite3")
+    first = store.save(
+        "latest-versions",
+        [("3.12", "stable", "u12"), ("3.12", "bugfix", "u12")],
+    )
+    second = store.save("latest-versions", [("3.12", "security-fixes", "u")])
+    history = store.connection.execute(
+        "SELECT run_id, status FROM latest_versions "
+        "WHERE version = '3.12' ORDER BY run_id"
+    ).fetchall()
+    store.close()
+
+    assert history == [(first, "bugfix"), (second, "security-fixes")], (
+        "Класс `ResultsStore` должен хранить строки каждого запуска "
+        "и обновлять повторы ключа внутри запуска"
+    )
+
+
+def test_results_store_keeps_pep_history(tmp_path):
+    store = storage.ResultsStore(tmp_path / "results.sqlite3")
+    url = "https://peps.python.org/pep-0008/"
+    first = store.save(
+        "pep",
+        [("Final", 10), ("Active", 2), ("Total", 12)],
+        [(8, "Active", "Active", url), (1, "Active", "Active", "u1")],
+    )
+    second = store.save(
+        "pep", [("Final", 1)], [(8, "Active", "Final", url)]
+    )
+    history = store.connection.execute(
+        "SELECT run_id, page_status FROM pep_records "
+        "WHERE number = 8 ORDER BY run_id"
+    ).fetchall()
+    counts = store.connection.execute(
+        "SELECT status FROM pep_statuses WHERE run_id = ? ORDER BY count",
+        (first,),
+    ).fetchall()
+    store.close()
+
+    assert history == [(first, "Active"), (second, "Final")], (
+        "Класс `ResultsStore` должен хранить статус каждого PEP "
+        "в каждом запуске"
+    )
+    assert counts == [("Active",), ("Final",)], (
+        "Количество PEP должно храниться и сравниваться как число, "
+        "итоговая строка не должна сохраняться как статус"
+    )
+
+
+def test_parsed_pages_store_invalidation(tmp_path, monkeypatch):
+    url = "https://peps.python.org/pep-0008/"
+    path = tmp_path / "parsed.sqlite3"
+    store = storage.ParsedPagesStore(path)
+    store.put("pep_status", url, "hash", "Active")
+    store.close()
+
+    store = storage.ParsedPagesStore(path)
+    assert store.get("pep_status", url, "hash") == "Active", (
+        "Поля неизменившейся страницы должны браться из кеша разбора"
+    )
+    assert store.get("pep_status", url, "other") is None, (
+        "При изменении содержимого страницы запись кеша разбора "
+        "не должна использоваться"
+    )
+    monkeypatch.setitem(storage.EXTRACTOR_VERSIONS, "pep_status", 2)
+    assert store.get("pep_status", url, "hash") is None, (
+        "При изменении версии функции извлечения запись кеша разбора "
+        "не должна использоваться"
+    )
+    store.close()